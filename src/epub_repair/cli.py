@@ -1,16 +1,28 @@
 """Command-line interface for EPUB repair tool."""
 
 import argparse
+import functools
+import os
 import sys
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 
-from .epub_io import extract_epub, parse_container, parse_opf, repackage_epub
-from .models import EpubBook
+from .epub_io import EpubArchive, parse_container, parse_opf, repackage_epub
+from .models import EpubBook, SpineItem
 from .reporting import Reporter
-from .rules import AGGRESSIVE_RULES, SAFE_RULES
+from .rules import AGGRESSIVE_RULES, PER_FILE_RULES, SAFE_RULES, TREE_RULES, apply_tree_rules
 
+# Books with at least this many content files run the per-file rules in
+# worker processes; smaller ones stay on threads, where there is no process
+# start-up cost to amortize
+_PROCESS_POOL_MIN_FILES = 16
+
+# Per-file rules and the book they apply to, set in each worker process by
+# _init_file_rule_worker()
+_WORKER_FILE_RULES: List[Callable] = []
+_WORKER_BOOK: Optional[EpubBook] = None
 
 def main() -> int:
     """Entry point for CLI application."""
@@ -102,7 +114,8 @@ def run_repair(
     input_path: Path,
     output_path: Path,
     mode: str = "safe",
-    report_path: Optional[Path] = None
+    report_path: Optional[Path] = None,
+    progress_cb: Optional[Callable[[float], None]] = None
 ) -> Dict:
     """
     Execute the EPUB repair pipeline.
@@ -112,6 +125,7 @@ def run_repair(
         output_path: Path to output EPUB file
         mode: 'safe' or 'aggressive'
         report_path: Optional path for report output
+        progress_cb: Optional callback receiving overall progress (0.0-1.0)
     
     Returns:
         Summary dictionary with repair statistics
@@ -131,11 +145,17 @@ def run_repair(
         rules = SAFE_RULES
     
     reporter = Reporter()
+    if progress_cb is None:
+        progress_cb = _no_progress
     
     # Extract EPUB to temporary directory
-    with tempfile.TemporaryDirectory() as temp_dir:
+    with (
+        EpubArchive(input_path) as archive,
+        tempfile.TemporaryDirectory(dir=_temp_root(archive)) as temp_dir,
+    ):
         temp_path = Path(temp_dir)
-        extract_epub(input_path, temp_path)
+        archive.extract(temp_path)
+        progress_cb(0.1)
         
         # Parse EPUB structure
         container_path = temp_path / "META-INF" / "container.xml"
@@ -157,18 +177,46 @@ def run_repair(
             manifest_items=manifest_items
         )
         
-        # Apply rules
-        for rule in rules:
-            try:
-                rule(book, reporter)
-            except Exception as e:
-                reporter.log_change(
-                    Path("unknown"),
-                    f"Rule {rule.__name__} failed: {e}"
-                )
+        # Apply per-file rules to each spine document concurrently: on
+        # threads for small books, in worker processes (free of the GIL)
+        # for larger ones
+        file_rules = [rule for rule in rules if rule in PER_FILE_RULES]
+        book_rules = [rule for rule in rules if rule not in PER_FILE_RULES]
+        
+        spine_groups: Dict[Path, List[SpineItem]] = {}
+        for spine_item in spine_items:
+            spine_groups.setdefault(spine_item.href, []).append(spine_item)
+        
+        # An empty spine still runs the rules once so counters are reported
+        groups = list(spine_groups.values()) or [[]]
+        max_workers = min(8, os.cpu_count() or 1)
+        if max_workers > 1 and len(groups) >= _PROCESS_POOL_MIN_FILES:
+            # Workers receive the book once and then only spine groups
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_file_rule_worker,
+                initargs=(file_rules, _single_file_book(book, []))
+            )
+            apply_group = _apply_file_rules_in_worker
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            apply_group = functools.partial(_apply_rules_to_group, file_rules, book)
         
-        # Repackage EPUB
-        repackage_epub(temp_path, output_path)
+        with executor:
+            # chunksize only affects the process pool
+            file_reporters = executor.map(apply_group, groups, chunksize=4)
+            # Merge in spine order so reports stay deterministic
+            for done, file_reporter in enumerate(file_reporters, 1):
+                reporter.merge(file_reporter)
+                progress_cb(0.1 + 0.7 * done / len(groups))
+        
+        # Book-level rules (CSS) run once over the whole book
+        reporter.merge(_apply_rules(book_rules, book))
+        progress_cb(0.9)
+        
+        # Repackage EPUB (untouched entries are copied from the source)
+        repackage_epub(temp_path, output_path, source=archive)
+        progress_cb(1.0)
     
     # Generate report
     summary = reporter.get_summary()
@@ -183,5 +231,115 @@ def run_repair(
     return summary
 
 
+def _no_progress(fraction: float) -> None:
+    """Default progress callback for run_repair (ignores updates)."""
+
+
+def _temp_root(archive: EpubArchive) -> Optional[str]:
+    """
+    Choose where the extraction directory is created.
+    
+    EPUB_REPAIR_TMPDIR wins if set. Otherwise /dev/shm is used so the
+    extracted book lives in RAM, provided it is writable and has room for the
+    unpacked EPUB (it is often small, e.g. 64 MB in Docker containers);
+    failing that, tempfile's default location.
+    
+    Args:
+        archive: Source archive about to be extracted
+    
+    Returns:
+        Directory for tempfile.TemporaryDirectory(dir=...), or None
+    """
+    override = os.environ.get("EPUB_REPAIR_TMPDIR")
+    if override:
+        return override
+    if not (os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK)):
+        return None
+    
+    unpacked_size = sum(info.file_size for info in archive.zip_file.infolist())
+    try:
+        stat = os.statvfs("/dev/shm")
+    except OSError:
+        return None
+    if stat.f_bavail * stat.f_frsize <= unpacked_size:
+        return None
+    return "/dev/shm"
+
+
+def _single_file_book(book: EpubBook, spine_items: List[SpineItem]) -> EpubBook:
+    """Create a view of book whose spine only covers one content file."""
+    return EpubBook(
+        root_path=book.root_path,
+        opf_path=book.opf_path,
+        spine_items=spine_items,
+        manifest_items=book.manifest_items
+    )
+
+
+def _init_file_rule_worker(file_rules: List[Callable], book: EpubBook) -> None:
+    """Store the per-file rules and book in a worker process."""
+    global _WORKER_FILE_RULES, _WORKER_BOOK
+    _WORKER_FILE_RULES = file_rules
+    _WORKER_BOOK = book
+
+
+def _apply_file_rules_in_worker(spine_items: List[SpineItem]) -> Reporter:
+    """Apply the per-file rules to one content file (worker process only)."""
+    return _apply_rules_to_group(_WORKER_FILE_RULES, _WORKER_BOOK, spine_items)
+
+
+def _apply_rules_to_group(
+    rules: List[Callable],
+    book: EpubBook,
+    spine_items: List[SpineItem]
+) -> Reporter:
+    """
+    Apply per-file rules to the view of book covering one content file.
+    
+    The file is parsed at most once and written at most once, however many
+    of the rules change it.
+    
+    Args:
+        rules: Per-file rule functions to apply
+        book: Book the content file belongs to
+        spine_items: Spine items referring to the content file
+    
+    Returns:
+        Reporter with the rules' counters and changes
+    """
+    reporter = Reporter()
+    tree_rules = [TREE_RULES[rule] for rule in rules]
+    try:
+        apply_tree_rules(tree_rules, _single_file_book(book, spine_items), reporter)
+    except Exception as e:
+        reporter.log_change_fast("unknown", f"Per-file rules failed: {e}")
+    return reporter
+
+
+def _apply_rules(rules: List[Callable], book: EpubBook) -> Reporter:
+    """
+    Apply rules to book in order, collecting results in a new Reporter.
+    
+    Args:
+        rules: Rule functions to apply
+        book: Book (or single-file view of a book) to repair
+    
+    Returns:
+        Reporter with the rules' counters and changes
+    """
+    reporter = Reporter()
+    for rule in rules:
+        _run_rule(rule, book, reporter)
+    return reporter
+
+
+def _run_rule(rule: Callable, book: EpubBook, reporter: Reporter) -> None:
+    """Apply one rule, logging its failure instead of raising."""
+    try:
+        rule(book, reporter)
+    except Exception as e:
+        reporter.log_change_fast("unknown", f"Rule {rule.__name__} failed: {e}")
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -1,6 +1,9 @@
 """CSS parsing and manipulation utilities."""
 
-from typing import List, Optional
+import functools
+import sys
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
 try:
     import tinycss2
@@ -8,6 +11,13 @@ try:
 except ImportError:
     TINYCSS2_AVAILABLE = False
 
+# Serialized selectors keyed by id() of the rule's prelude token list.
+# tinycss2 nodes use __slots__ (no attribute caching, no weakrefs), so the
+# memo holds the prelude itself; that keeps the id from being reused while
+# the entry is alive, and the identity check on lookup guards the rest.
+_SELECTOR_MEMO: "OrderedDict[int, Tuple[List, str]]" = OrderedDict()
+_SELECTOR_MEMO_SIZE = 4096
+
 
 def parse_css(css_text: str) -> List:
     """
@@ -34,32 +44,86 @@ def parse_css(css_text: str) -> List:
     return rules
 
 
-def find_rules_by_selector(rules: List, selector_pattern: str) -> List:
+def _selector_text(rule) -> str:
+    """Serialize a rule's prelude into an interned selector string."""
+    prelude = rule.prelude
+    memo = _SELECTOR_MEMO.get(id(prelude))
+    if memo is not None and memo[0] is prelude:
+        _SELECTOR_MEMO.move_to_end(id(prelude))
+        return memo[1]
+    
+    try:
+        selector_text = "".join(tinycss2.serialize(prelude)).strip()
+    except:
+        # Fallback: try to get string representation
+        selector_text = str(prelude).strip()
+    selector_text = sys.intern(selector_text)
+    
+    _SELECTOR_MEMO[id(prelude)] = (prelude, selector_text)
+    if len(_SELECTOR_MEMO) > _SELECTOR_MEMO_SIZE:
+        _SELECTOR_MEMO.popitem(last=False)
+    return selector_text
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_value(value: str) -> tuple:
+    """Parse a declaration value once; callers get a fresh list per use."""
+    return tuple(tinycss2.parse_component_value_list(value))
+
+
+def build_selector_index(rules: List) -> Dict[str, List]:
+    """
+    Index rules by selector text.
+    
+    Build this once per parsed stylesheet and pass it to the lookup helpers
+    to avoid re-serializing every rule prelude on each query.
+    
+    Args:
+        rules: List of parsed rules
+    
+    Returns:
+        Dict of selector text -> matching rules (in stylesheet order)
+    """
+    index: Dict[str, List] = {}
+    for rule in rules:
+        if hasattr(rule, "prelude"):
+            index.setdefault(_selector_text(rule), []).append(rule)
+    return index
+
+
+def find_rules_by_selector(
+    rules: List,
+    selector_pattern: str,
+    index: Optional[Dict[str, List]] = None
+) -> List:
     """
     Find rules matching a selector pattern.
     
     Args:
         rules: List of parsed rules
         selector_pattern: CSS selector pattern (exact match)
+        index: Optional index from build_selector_index() for O(1) lookup
     
     Returns:
         List of matching rules
     """
+    if index is not None:
+        return index.get(selector_pattern, [])
+    
     matching = []
     for rule in rules:
-        if hasattr(rule, "prelude"):
-            # tinycss2 rules have a prelude (selector) and content (declarations)
-            try:
-                selector_text = "".join(tinycss2.serialize(rule.prelude)).strip()
-            except:
-                # Fallback: try to get string representation
-                selector_text = str(rule.prelude).strip()
-            if selector_text == selector_pattern:
-                matching.append(rule)
+        # tinycss2 rules have a prelude (selector) and content (declarations)
+        if hasattr(rule, "prelude") and _selector_text(rule) == selector_pattern:
+            matching.append(rule)
     return matching
 
 
-def remove_property(rules: List, selector: str, property_name: str) -> int:
+def remove_property(
+    rules: List,
+    selector: str,
+    property_name: str,
+    index: Optional[Dict[str, List]] = None
+) -> int:
     """
     Remove CSS property from matching rules.
     
@@ -67,12 +131,13 @@ def remove_property(rules: List, selector: str, property_name: str) -> int:
         rules: List of parsed rules
         selector: Selector pattern to match
         property_name: Property to remove
+        index: Optional index from build_selector_index()
     
     Returns:
         Number of properties removed
     """
     count = 0
-    matching_rules = find_rules_by_selector(rules, selector)
+    matching_rules = find_rules_by_selector(rules, selector, index)
     
     for rule in matching_rules:
         if hasattr(rule, "content"):
@@ -91,7 +156,8 @@ def modify_property(
     rules: List,
     selector: str,
     property_name: str,
-    new_value: str
+    new_value: str,
+    index: Optional[Dict[str, List]] = None
 ) -> int:
     """
     Modify CSS property value in matching rules.
@@ -101,12 +167,13 @@ def modify_property(
         selector: Selector pattern to match
         property_name: Property to modify
         new_value: New property value
+        index: Optional index from build_selector_index()
     
     Returns:
         Number of properties modified
     """
     count = 0
-    matching_rules = find_rules_by_selector(rules, selector)
+    matching_rules = find_rules_by_selector(rules, selector, index)
     
     for rule in matching_rules:
         if hasattr(rule, "content"):
@@ -114,7 +181,7 @@ def modify_property(
                 if hasattr(decl, "name") and decl.name == property_name:
                     # Create new declaration with new value
                     # Note: This is simplified; full implementation needs proper token handling
-                    decl.value = tinycss2.parse_component_value_list(new_value)
+                    decl.value = list(_parse_value(new_value))
                     count += 1
     
     return count
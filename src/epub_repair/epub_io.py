@@ -1,12 +1,63 @@
 """EPUB I/O utilities for extraction, parsing, and repackaging."""
 
+import os
+import posixpath
+import re
+import struct
+import sys
 import tempfile
+import threading
+import time
 import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
-from xml.etree import ElementTree as ET
+from typing import Deque, Dict, List, Optional, Tuple
+
+try:
+    from lxml import etree as ET
+    LXML_AVAILABLE = True
+except ImportError:
+    from xml.etree import ElementTree as ET
+    LXML_AVAILABLE = False
 
 from .models import EpubBook, ManifestItem, SpineItem
+from .zip_writer import compress_file, write_compressed_file, write_raw_entry
+
+# EPUB container namespace
+OCF_NS = {"ocf": "urn:oasis:names:tc:opendocument:xmlns:container"}
+
+# EPUB namespaces (handle both EPUB 2 and 3)
+OPF_NS = {
+    "opf": "http://www.idpf.org/2007/opf",
+    "dc": "http://purl.org/dc/elements/1.1/",
+}
+
+_OPF_MANIFEST_TAG = "{http://www.idpf.org/2007/opf}manifest"
+_OPF_ITEM_TAG = "{http://www.idpf.org/2007/opf}item"
+_OPF_SPINE_TAG = "{http://www.idpf.org/2007/opf}spine"
+_OPF_ITEMREF_TAG = "{http://www.idpf.org/2007/opf}itemref"
+_OPF_STREAM_TAGS = (_OPF_MANIFEST_TAG, _OPF_ITEM_TAG, _OPF_SPINE_TAG, _OPF_ITEMREF_TAG)
+
+_OCF_ROOTFILE_PATH = (
+    "{urn:oasis:names:tc:opendocument:xmlns:container}rootfiles/"
+    "{urn:oasis:names:tc:opendocument:xmlns:container}rootfile"
+)
+
+# Below this many entries, extraction stays on the calling thread
+_PARALLEL_EXTRACT_MIN = 16
+
+if LXML_AVAILABLE:
+    # Compiled once; <rootfiles> is always a direct child of <container>,
+    # so no descendant scan is needed.
+    _ROOTFILE_XP = ET.XPath("/ocf:container/ocf:rootfiles/ocf:rootfile", namespaces=OCF_NS)
+
+# Fast path for the usual, tiny container.xml: pick the rootfile tags and
+# their attributes out with regexes instead of running an XML parser
+_ROOTFILE_TAG_RE = re.compile(rb"<(?:[\w.-]+:)?rootfile\b([^>]*)>")
+_XML_ATTR_RE = re.compile(rb"""([\w.:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+_OPF_MEDIA_TYPES = ("application/oebps-package+xml", "application/epub+zip")
 
 
 def extract_epub(epub_path: Path, temp_dir: Path) -> Path:
@@ -30,11 +81,130 @@ def extract_epub(epub_path: Path, temp_dir: Path) -> Path:
     temp_dir.mkdir(parents=True, exist_ok=True)
     
     with zipfile.ZipFile(epub_path, "r") as zip_file:
-        zip_file.extractall(temp_dir)
+        _extract_entries(epub_path, zip_file, str(temp_dir))
     
     return temp_dir
 
 
+def _extract_entries(
+    epub_path: Path,
+    zip_file: zipfile.ZipFile,
+    root: str
+) -> List[Tuple[zipfile.ZipInfo, str]]:
+    """
+    Extract every entry of zip_file under root.
+    
+    Archives with many entries are inflated on a thread pool (zlib releases
+    the GIL); each worker reads through its own handle on epub_path.
+    
+    Returns:
+        List of (ZipInfo, extracted path) in archive order
+    """
+    infos = zip_file.infolist()
+    if len(infos) < _PARALLEL_EXTRACT_MIN:
+        return [(info, zip_file.extract(info, root)) for info in infos]
+    
+    local = threading.local()
+    handles: List[zipfile.ZipFile] = []
+    
+    def extract_one(info: zipfile.ZipInfo) -> str:
+        handle = getattr(local, "zip_file", None)
+        if handle is None:
+            handle = local.zip_file = zipfile.ZipFile(epub_path, "r")
+            handles.append(handle)
+        try:
+            return handle.extract(info, root)
+        except FileExistsError:
+            # Another worker created the same parent directory first
+            return handle.extract(info, root)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+            return list(zip(infos, executor.map(extract_one, infos)))
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+class EpubArchive:
+    """
+    Read-only handle on a source EPUB that tracks what the repair touches.
+    
+    Entries are extracted as usual (rules operate on files), but each file
+    is stamped with its archive timestamp so repackage_epub() can tell which
+    ones a rule rewrote; rewritten files whose contents still match the
+    entry's CRC-32 count as untouched. Untouched entries are then copied straight from the
+    source archive instead of being re-read from the extraction directory.
+    """
+    
+    def __init__(self, epub_path: Path):
+        if not epub_path.exists():
+            raise FileNotFoundError(f"EPUB file not found: {epub_path}")
+        
+        self.epub_path = epub_path
+        self.zip_file = zipfile.ZipFile(epub_path, "r")
+        # arcname -> (source ZipInfo, (size, mtime_ns) as extracted)
+        self._extracted: Dict[str, Tuple[zipfile.ZipInfo, Tuple[int, int]]] = {}
+    
+    def __enter__(self) -> "EpubArchive":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Close the underlying ZIP file."""
+        self.zip_file.close()
+    
+    def extract(self, temp_dir: Path) -> Path:
+        """
+        Extract all entries to temp_dir, recording their on-disk state.
+        
+        Args:
+            temp_dir: Directory to extract into
+        
+        Returns:
+            Path to extracted root directory
+        """
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        root = str(temp_dir)
+        
+        for info, target in _extract_entries(self.epub_path, self.zip_file, root):
+            if info.is_dir():
+                continue
+            mtime_ns = int(time.mktime(info.date_time + (0, 0, -1))) * 1_000_000_000
+            os.utime(target, ns=(mtime_ns, mtime_ns))
+            arcname = os.path.relpath(target, root).replace(os.sep, "/")
+            self._extracted[arcname] = (info, (info.file_size, mtime_ns))
+        
+        return temp_dir
+    
+    def source_entry(self, arcname: str, path: str) -> Optional[zipfile.ZipInfo]:
+        """
+        Return the source entry for an unmodified extracted file.
+        
+        Args:
+            arcname: Archive name of the file
+            path: Extracted file path
+        
+        Returns:
+            Source ZipInfo if the file is unchanged since extraction, else None
+        """
+        if arcname not in self._extracted:
+            return None
+        info, state = self._extracted[arcname]
+        st = os.stat(path)
+        if (st.st_size, st.st_mtime_ns) == state:
+            return info
+        if st.st_size != info.file_size:
+            return None
+        # Rewritten, possibly with identical bytes (rules often serialize a
+        # document they did not change); compare against the stored CRC-32
+        if _file_crc32(path) != info.CRC:
+            return None
+        return info
+
+
 def parse_container(container_path: Path) -> Path:
     """
     Parse META-INF/container.xml to find OPF path.
@@ -49,21 +219,23 @@ def parse_container(container_path: Path) -> Path:
         XMLSyntaxError: If container.xml is malformed
         ValueError: If OPF reference not found
     """
+    opf_path = _scan_container(container_path.read_bytes())
+    if opf_path is not None:
+        return opf_path
+    
     try:
-        tree = ET.parse(container_path)
+        tree = ET.parse(str(container_path))
     except ET.ParseError as e:
         raise ValueError(f"Malformed container.xml: {e}") from e
     
-    root = tree.getroot()
-    
-    # EPUB container namespace
-    ns = {"ocf": "urn:oasis:names:tc:opendocument:xmlns:container"}
-    
     # Find rootfile with media-type="application/oebps-package+xml" or "application/epub+zip"
-    rootfiles = root.findall(".//ocf:rootfile", ns)
+    if LXML_AVAILABLE:
+        rootfiles = _ROOTFILE_XP(tree)
+    else:
+        rootfiles = tree.getroot().findall(_OCF_ROOTFILE_PATH)
     for rootfile in rootfiles:
         media_type = rootfile.get("media-type", "")
-        if media_type in ("application/oebps-package+xml", "application/epub+zip"):
+        if media_type in _OPF_MEDIA_TYPES:
             opf_path_str = rootfile.get("full-path", "")
             if opf_path_str:
                 return Path(opf_path_str)
@@ -71,6 +243,37 @@ def parse_container(container_path: Path) -> Path:
     raise ValueError("OPF file reference not found in container.xml")
 
 
+def _scan_container(data: bytes) -> Optional[Path]:
+    """
+    Find the OPF path in container.xml bytes without parsing the XML.
+    
+    Args:
+        data: Raw container.xml contents
+    
+    Returns:
+        Path to OPF file, or None if the file needs a real XML parse
+        (comments, CDATA, entity references, non-UTF-8 encodings, or no
+        matching rootfile)
+    """
+    if b"<!--" in data or b"<![CDATA[" in data or data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return None
+    
+    for match in _ROOTFILE_TAG_RE.finditer(data):
+        attrs = {}
+        for name, double_quoted, single_quoted in _XML_ATTR_RE.findall(match.group(1)):
+            attrs[name] = double_quoted or single_quoted
+        full_path = attrs.get(b"full-path", b"")
+        if b"&" in full_path:
+            return None
+        if attrs.get(b"media-type", b"").decode("ascii", "replace") in _OPF_MEDIA_TYPES and full_path:
+            try:
+                return Path(full_path.decode("utf-8"))
+            except UnicodeDecodeError:
+                return None
+    
+    return None
+
+
 def parse_opf(opf_path: Path, root_path: Path) -> Tuple[List[SpineItem], Dict[str, ManifestItem]]:
     """
     Parse OPF file to extract spine and manifest.
@@ -86,57 +289,79 @@ def parse_opf(opf_path: Path, root_path: Path) -> Tuple[List[SpineItem], Dict[st
         XMLSyntaxError: If OPF is malformed
         ValueError: If required elements missing
     """
+    manifest_items: Dict[str, ManifestItem] = {}
+    spine_idrefs: List[str] = []
+    found_manifest = False
+    found_spine = False
+    
+    # Hrefs are resolved lexically; the extracted tree has no symlinks, so
+    # there is no need for a realpath() per manifest item
+    opf_parent_str = posixpath.normpath(opf_path.parent.absolute().as_posix())
+    root_str = posixpath.normpath(root_path.absolute().as_posix())
+    
+    # Stream the OPF instead of building a full tree: only <item> and
+    # <itemref> carry data we need, and large packages can list many
+    # thousands of them.
     try:
-        tree = ET.parse(opf_path)
+        with open(opf_path, "rb") as fh:
+            if LXML_AVAILABLE:
+                events = ET.iterparse(fh, events=("end",), tag=_OPF_STREAM_TAGS)
+            else:
+                events = ET.iterparse(fh, events=("end",))
+            
+            for _, elem in events:
+                tag = elem.tag
+                if tag == _OPF_ITEM_TAG:
+                    item_id = elem.get("id")
+                    if item_id:
+                        # Spine idrefs repeat these ids; interned copies let
+                        # the lookups below match by identity
+                        item_id = sys.intern(item_id)
+                    href = elem.get("href", "")
+                    media_type = elem.get("media-type", "")
+                    
+                    if item_id:
+                        # Resolve href relative to OPF location, then relative to root
+                        absolute_href = posixpath.normpath(posixpath.join(opf_parent_str, href))
+                        relative_href = posixpath.relpath(absolute_href, root_str)
+                        if relative_href == ".." or relative_href.startswith("../"):
+                            # If not relative, use the href as-is
+                            resolved_href = Path(href)
+                        else:
+                            resolved_href = Path(relative_href)
+                        
+                        manifest_items[item_id] = ManifestItem(
+                            id=item_id,
+                            href=resolved_href,
+                            media_type=media_type
+                        )
+                elif tag == _OPF_ITEMREF_TAG:
+                    spine_idrefs.append(sys.intern(elem.get("idref", "")))
+                elif tag == _OPF_MANIFEST_TAG:
+                    found_manifest = True
+                elif tag == _OPF_SPINE_TAG:
+                    found_spine = True
+                else:
+                    continue
+                
+                # Free processed elements (and already-seen siblings) as we go
+                elem.clear()
+                if LXML_AVAILABLE:
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
     except ET.ParseError as e:
         raise ValueError(f"Malformed OPF file: {e}") from e
     
-    root = tree.getroot()
-    
-    # EPUB namespaces (handle both EPUB 2 and 3)
-    ns = {
-        "opf": "http://www.idpf.org/2007/opf",
-        "dc": "http://purl.org/dc/elements/1.1/",
-    }
-    
-    # Parse manifest
-    manifest_items: Dict[str, ManifestItem] = {}
-    manifest_elem = root.find(".//opf:manifest", ns)
-    if manifest_elem is None:
+    if not found_manifest:
         raise ValueError("Manifest element not found in OPF")
-    
-    for item_elem in manifest_elem.findall("opf:item", ns):
-        item_id = item_elem.get("id")
-        href = item_elem.get("href", "")
-        media_type = item_elem.get("media-type", "")
-        
-        if item_id:
-            # Resolve href relative to OPF location
-            opf_parent = opf_path.parent
-            absolute_href = (opf_parent / href).resolve()
-            # Get relative path from root
-            try:
-                resolved_href = absolute_href.relative_to(root_path.resolve())
-            except ValueError:
-                # If not relative, use the href as-is
-                resolved_href = Path(href)
-            
-            manifest_items[item_id] = ManifestItem(
-                id=item_id,
-                href=resolved_href,
-                media_type=media_type
-            )
+    if not found_spine:
+        raise ValueError("Spine element not found in OPF")
     
     # Parse spine
     spine_items: List[SpineItem] = []
-    spine_elem = root.find(".//opf:spine", ns)
-    if spine_elem is None:
-        raise ValueError("Spine element not found in OPF")
-    
-    for itemref_elem in spine_elem.findall("opf:itemref", ns):
-        idref = itemref_elem.get("idref", "")
-        if idref and idref in manifest_items:
-            manifest_item = manifest_items[idref]
+    for idref in spine_idrefs:
+        manifest_item = manifest_items.get(idref) if idref else None
+        if manifest_item is not None:
             # Resolve to absolute path
             absolute_href = root_path / manifest_item.href
             
@@ -148,13 +373,19 @@ def parse_opf(opf_path: Path, root_path: Path) -> Tuple[List[SpineItem], Dict[st
     return spine_items, manifest_items
 
 
-def repackage_epub(temp_dir: Path, output_path: Path) -> None:
+def repackage_epub(
+    temp_dir: Path,
+    output_path: Path,
+    source: Optional[EpubArchive] = None
+) -> None:
     """
     Create EPUB ZIP from temporary directory.
     
     Args:
         temp_dir: Temporary directory with EPUB contents
         output_path: Path to output EPUB file
+        source: Archive temp_dir was extracted from; entries left untouched
+            since extraction are copied from it instead of from disk
     
     Raises:
         IOError: If ZIP creation fails
@@ -162,18 +393,131 @@ def repackage_epub(temp_dir: Path, output_path: Path) -> None:
     Notes:
         - mimetype must be first entry (uncompressed)
         - Preserve directory structure
-        - Use ZIP_DEFLATED compression (except mimetype)
+        - Use ZIP_DEFLATED compression, except mimetype, already-compressed
+          media and files under 512 bytes (stored)
+        - Entries are deflated in parallel (a bounded window at a time),
+          then written in order
+        - ZIP is written to "<output>.part" and moved over output_path once complete
     """
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        # Add mimetype first, uncompressed (EPUB spec requirement)
-        mimetype_path = temp_dir / "mimetype"
-        if mimetype_path.exists():
-            zip_file.write(mimetype_path, "mimetype", compress_type=zipfile.ZIP_STORED)
+    entries = [
+        (arcname, path) for arcname, path in _scan_files(str(temp_dir))
+        if arcname != "mimetype"
+    ]
+    
+    # Write next to the output and rename into place, so a crash never leaves
+    # a truncated EPUB behind and the final move stays on one filesystem
+    part_path = output_path.with_suffix(output_path.suffix + ".part")
+    try:
+        with zipfile.ZipFile(part_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            # Add mimetype first, uncompressed (EPUB spec requirement)
+            mimetype_path = temp_dir / "mimetype"
+            if mimetype_path.exists():
+                zip_file.write(mimetype_path, "mimetype", compress_type=zipfile.ZIP_STORED)
+            
+            # zlib releases the GIL while compressing, so threads scale across
+            # cores; at most 2 * max_workers entries are in flight, so only that
+            # many compressed payloads are ever held in memory
+            max_workers = min(8, os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pending: Deque[Tuple[str, str, Optional[zipfile.ZipInfo], Optional[Future]]] = deque()
+                for arcname, path in entries:
+                    source_info = source.source_entry(arcname, path) if source is not None else None
+                    if source_info is not None:
+                        pending.append((arcname, path, source_info, None))
+                    else:
+                        pending.append((arcname, path, None, executor.submit(compress_file, path)))
+                    if len(pending) > 2 * max_workers:
+                        _write_pending(zip_file, source, *pending.popleft())
+                
+                while pending:
+                    _write_pending(zip_file, source, *pending.popleft())
         
-        # Add all other files
-        for file_path in temp_dir.rglob("*"):
-            if file_path.is_file() and file_path.name != "mimetype":
-                arcname = file_path.relative_to(temp_dir)
-                zip_file.write(file_path, arcname, compress_type=zipfile.ZIP_DEFLATED)
+        os.replace(part_path, output_path)
+    except BaseException:
+        if part_path.exists():
+            part_path.unlink()
+        raise
+
+
+def _write_pending(
+    zip_file: zipfile.ZipFile,
+    source: Optional[EpubArchive],
+    arcname: str,
+    path: str,
+    source_info: Optional[zipfile.ZipInfo],
+    future: Optional[Future]
+) -> None:
+    """
+    Write one queued repackage_epub() entry to zip_file.
+    
+    The entry is either copied from the source archive (source_info) or
+    taken from its compression future, waiting for it if needed.
+    """
+    if source_info is not None:
+        _copy_entry(source.zip_file, source_info, zip_file)
+        return
+    write_compressed_file(zip_file, path, arcname, future.result())
+
+
+def _copy_entry(
+    source_zip: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    zip_file: zipfile.ZipFile
+) -> None:
+    """
+    Copy one entry from source_zip without decompressing it.
+    
+    The compressed payload is read straight from the source archive and
+    written back with the original compression method, CRC and sizes.
+    """
+    source_zip.fp.seek(info.header_offset)
+    header = source_zip.fp.read(zipfile.sizeFileHeader)
+    fields = struct.unpack(zipfile.structFileHeader, header)
+    if fields[zipfile._FH_SIGNATURE] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad local file header for {info.filename}")
+    source_zip.fp.seek(
+        fields[zipfile._FH_FILENAME_LENGTH] + fields[zipfile._FH_EXTRA_FIELD_LENGTH], os.SEEK_CUR
+    )
+    raw = source_zip.fp.read(info.compress_size)
+    
+    zinfo = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    zinfo.compress_type = info.compress_type
+    zinfo.external_attr = info.external_attr
+    # The copy carries sizes in its local header, so no data descriptor
+    zinfo.flag_bits = info.flag_bits & ~0x08
+    zinfo.CRC = info.CRC
+    zinfo.file_size = info.file_size
+    zinfo.compress_size = info.compress_size
+    write_raw_entry(zip_file, zinfo, raw)
+
+
+def _scan_files(root: str, prefix: str = "") -> List[Tuple[str, str]]:
+    """
+    Recursively list files below root as (arcname, path) pairs.
+    
+    Uses os.scandir so file-type checks come from the directory entry
+    instead of an extra stat per file.
+    """
+    files: List[Tuple[str, str]] = []
+    with os.scandir(root) as it:
+        for entry in it:
+            arcname = prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                files.extend(_scan_files(entry.path, arcname + "/"))
+            elif entry.is_file():
+                files.append((arcname, entry.path))
+    return files
+
+
+def _file_crc32(path: str) -> int:
+    """Compute the CRC-32 of a file, as stored in ZIP headers."""
+    crc = 0
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(1 << 20)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+    return crc
@@ -1,23 +1,112 @@
 """Simple GUI for EPUB Repair and Upgrade tools using Tkinter."""
 
+import multiprocessing
+import os
+import queue
 import sys
 import threading
 import tempfile
 import tkinter as tk
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import Optional
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 
 from .cli import run_repair
 
-try:
-    from epub_upgrade.cli import parse_args
-    from epub_upgrade.epub_io import copy_epub, extract_epub, get_opf_path, repackage_epub, verify_epub_file
-    from epub_upgrade.reporting import Reporter as UpgradeReporter
+# epub_upgrade is imported on first use (see _ensure_upgrade_loaded);
+# None until then
+UPGRADE_AVAILABLE: Optional[bool] = None
+
+# How often the main thread applies queued worker messages (20 Hz), and how
+# many it handles per tick
+_PUMP_INTERVAL_MS = 50
+_PUMP_BATCH = 500
+
+# Oldest result lines are dropped beyond this, so a long run (or a large
+# traceback) cannot make every later insert slower
+_MAX_RESULT_LINES = 5000
+
+# Repairs and upgrades run in a separate process so their CPU work never
+# competes with Tk for the GIL; created on first use and kept for later runs.
+# The worker reports progress fractions on _PROGRESS_Q.
+_EXECUTOR: Optional[ProcessPoolExecutor] = None
+_PROGRESS_Q = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Return the worker process pool, starting it if needed."""
+    global _EXECUTOR, _PROGRESS_Q
+    if _EXECUTOR is None:
+        context = multiprocessing.get_context("spawn")
+        _PROGRESS_Q = context.Queue()
+        _EXECUTOR = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=context,
+            initializer=_init_worker_process,
+            initargs=(_PROGRESS_Q,)
+        )
+    return _EXECUTOR
+
+
+def _reset_executor() -> None:
+    """Shut down a broken worker pool so the next run starts a fresh one."""
+    global _EXECUTOR, _PROGRESS_Q
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    _EXECUTOR = None
+    _PROGRESS_Q = None
+
+
+def _init_worker_process(progress_q) -> None:
+    """Receive the progress queue in the worker process."""
+    global _PROGRESS_Q
+    _PROGRESS_Q = progress_q
+
+
+def _report_progress(fraction: float) -> None:
+    """Send a progress fraction (0.0-1.0) to the GUI (worker process only)."""
+    _PROGRESS_Q.put(fraction)
+
+
+def _repair_in_worker(input_path: Path, output_path: Path, mode: str, report_path: Optional[Path]):
+    """
+    Run the repair pipeline (runs in the worker process).
+    
+    Returns:
+        Summary dictionary from run_repair()
+    """
+    return run_repair(
+        input_path=input_path,
+        output_path=output_path,
+        mode=mode,
+        report_path=report_path,
+        progress_cb=_report_progress
+    )
+
+
+def _upgrade_extracted(extracted_root: Path, target_version: str, reporter, force_rewrite: bool, output_path: Path):
+    """
+    Upgrade an extracted EPUB and repackage it (runs in the worker process).
+    
+    Returns:
+        The reporter, updated with the upgrade results
+    """
+    from epub_upgrade.epub_io import repackage_epub
     from epub_upgrade.upgrade import upgrade_to_epub3
-    from epub_upgrade.versioning import detect_epub_version, load_opf
-    UPGRADE_AVAILABLE = True
-except ImportError:
-    UPGRADE_AVAILABLE = False
+    
+    upgrade_to_epub3(
+        extracted_root,
+        target_version,
+        reporter,
+        force_rewrite,
+        progress_cb=lambda fraction: _report_progress(0.9 * fraction)
+    )
+    repackage_epub(extracted_root, output_path)
+    _report_progress(1.0)
+    return reporter
 
 
 class EpubRepairGUI:
@@ -33,6 +122,13 @@ class EpubRepairGUI:
         self.input_path = tk.StringVar()
         self.output_path = tk.StringVar()
         
+        # Output follows the input ("<name>_repaired.epub") until the user
+        # picks or types an output path of their own
+        self._output_user_set = False
+        self._suggesting_output = False
+        self.input_path.trace_add("write", self._on_input_changed)
+        self.output_path.trace_add("write", self._on_output_changed)
+        
         # Repair variables
         self.mode = tk.StringVar(value="safe")
         self.report_path = tk.StringVar()
@@ -46,6 +142,12 @@ class EpubRepairGUI:
         self.upgrade_report_path = tk.StringVar()
         self.generate_upgrade_report = tk.BooleanVar(value=False)
         
+        # Worker threads never touch Tk directly; they queue messages that
+        # _pump() applies on the main thread
+        self._msg_q: "queue.Queue[tuple]" = queue.Queue()
+        
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        
         self._create_widgets()
     
     def _create_widgets(self):
@@ -79,24 +181,59 @@ class EpubRepairGUI:
         repair_frame.columnconfigure(1, weight=1)
         self._create_repair_widgets(repair_frame)
         
-        # Upgrade tab
-        upgrade_frame = ttk.Frame(notebook, padding="10")
-        notebook.add(upgrade_frame, text="Version Upgrade")
-        upgrade_frame.columnconfigure(1, weight=1)
-        if UPGRADE_AVAILABLE:
-            self._create_upgrade_widgets(upgrade_frame)
-        else:
-            ttk.Label(
-                upgrade_frame,
-                text="EPUB Upgrade module not available",
-                foreground="gray"
-            ).grid(row=0, column=0, columnspan=3, pady=20)
+        # Upgrade tab (populated the first time it is shown)
+        self.upgrade_frame = ttk.Frame(notebook, padding="10")
+        notebook.add(self.upgrade_frame, text="Version Upgrade")
+        self.upgrade_frame.columnconfigure(1, weight=1)
+        self._upgrade_tab_built = False
+        notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
         
         # Action buttons and status (below tabs)
         self._create_action_area(main_frame)
         
         # Results area (bottom)
         self._create_results_area(main_frame)
+        
+        self.root.after(_PUMP_INTERVAL_MS, self._pump)
+    
+    def _on_close(self):
+        """Stop the worker process and close the window."""
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+    
+    def _ensure_upgrade_loaded(self) -> bool:
+        """
+        Import the epub_upgrade package on first use.
+        
+        Returns:
+            True if the upgrade tool is available
+        """
+        global UPGRADE_AVAILABLE
+        if UPGRADE_AVAILABLE is None:
+            try:
+                # upgrade pulls in epub_io, nav_conversion, reporting and versioning
+                import epub_upgrade.upgrade  # noqa: F401
+                UPGRADE_AVAILABLE = True
+            except ImportError:
+                UPGRADE_AVAILABLE = False
+        return UPGRADE_AVAILABLE
+    
+    def _on_tab_changed(self, event):
+        """Build the upgrade tab the first time it is selected."""
+        notebook = event.widget
+        if self._upgrade_tab_built or notebook.nametowidget(notebook.select()) is not self.upgrade_frame:
+            return
+        
+        self._upgrade_tab_built = True
+        if self._ensure_upgrade_loaded():
+            self._create_upgrade_widgets(self.upgrade_frame)
+        else:
+            ttk.Label(
+                self.upgrade_frame,
+                text="EPUB Upgrade module not available",
+                foreground="gray"
+            ).grid(row=0, column=0, columnspan=3, pady=20)
     
     def _create_shared_widgets(self, parent):
         """Create shared file selection widgets."""
@@ -270,21 +407,21 @@ class EpubRepairGUI:
         )
         self.repair_button.pack(side=tk.LEFT, padx=5)
         
-        if UPGRADE_AVAILABLE:
-            self.upgrade_button = ttk.Button(
-                buttons_frame,
-                text="Upgrade EPUB",
-                command=self._run_upgrade,
-                width=20
-            )
-            self.upgrade_button.pack(side=tk.LEFT, padx=5)
+        self.upgrade_button = ttk.Button(
+            buttons_frame,
+            text="Upgrade EPUB",
+            command=self._run_upgrade,
+            width=20
+        )
+        self.upgrade_button.pack(side=tk.LEFT, padx=5)
         
         row += 1
         
         # Progress bar
         self.progress = ttk.Progressbar(
             parent,
-            mode="indeterminate",
+            mode="determinate",
+            maximum=100,
             length=400
         )
         self.progress.grid(row=row, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
@@ -310,30 +447,65 @@ class EpubRepairGUI:
             state="disabled"
         )
         self.results_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self._line_count = 0
+    
+    def _file_dialog(self, dialog, **options) -> str:
+        """
+        Show a file dialog owned by the main window.
+        
+        Args:
+            dialog: filedialog function to call
+            **options: Options passed on to the dialog
+        
+        Returns:
+            Selected filename, or an empty string if cancelled
+        """
+        # Flush pending redraws first, and give the dialog an explicit
+        # parent so it is transient for the main window
+        self.root.update_idletasks()
+        return dialog(parent=self.root, **options)
     
     def _browse_input(self):
         """Browse for input EPUB file."""
-        filename = filedialog.askopenfilename(
+        filename = self._file_dialog(
+            filedialog.askopenfilename,
             title="Select Input EPUB File",
             filetypes=[("EPUB files", "*.epub"), ("All files", "*.*")]
         )
         if filename:
             self.input_path.set(filename)
-            # Auto-suggest output path in the same folder as input
-            input_path = Path(filename)
-            output_path = input_path.parent / f"{input_path.stem}_repaired{input_path.suffix}"
-            self.output_path.set(str(output_path))
+    
+    @staticmethod
+    def _suggest_output(input_path: str) -> str:
+        """Suggest an output path next to the input ("<name>_repaired<ext>")."""
+        base, ext = os.path.splitext(input_path)
+        return f"{base}_repaired{ext}"
+    
+    def _on_input_changed(self, *_):
+        """Keep the suggested output path in sync with the input path."""
+        input_path = self.input_path.get()
+        if not input_path or self._output_user_set:
+            return
+        self._suggesting_output = True
+        try:
+            self.output_path.set(self._suggest_output(input_path))
+        finally:
+            self._suggesting_output = False
+    
+    def _on_output_changed(self, *_):
+        """Note when the output path was set by the user rather than suggested."""
+        if not self._suggesting_output:
+            self._output_user_set = bool(self.output_path.get())
     
     def _browse_output(self):
         """Browse for output EPUB file."""
         initial_dir = None
         initial_file = None
         if self.input_path.get():
-            input_path = Path(self.input_path.get())
-            initial_dir = str(input_path.parent)
-            initial_file = f"{input_path.stem}_repaired{input_path.suffix}"
+            initial_dir, initial_file = os.path.split(self._suggest_output(self.input_path.get()))
         
-        filename = filedialog.asksaveasfilename(
+        filename = self._file_dialog(
+            filedialog.asksaveasfilename,
             title="Save Output EPUB File",
             defaultextension=".epub",
             initialdir=initial_dir,
@@ -345,7 +517,8 @@ class EpubRepairGUI:
     
     def _browse_report(self):
         """Browse for report file."""
-        filename = filedialog.asksaveasfilename(
+        filename = self._file_dialog(
+            filedialog.asksaveasfilename,
             title="Save Report File",
             defaultextension=".txt",
             filetypes=[
@@ -359,7 +532,8 @@ class EpubRepairGUI:
     
     def _browse_upgrade_report(self):
         """Browse for upgrade report file."""
-        filename = filedialog.asksaveasfilename(
+        filename = self._file_dialog(
+            filedialog.asksaveasfilename,
             title="Save Upgrade Report File",
             defaultextension=".json",
             filetypes=[
@@ -388,17 +562,128 @@ class EpubRepairGUI:
         self.upgrade_report_browse_btn.config(state=state)
     
     def _update_status(self, message: str):
-        """Update status label."""
-        self.status_label.config(text=message)
-        self.root.update_idletasks()
+        """Update status label (safe to call from worker threads)."""
+        self._msg_q.put(("status", message))
     
     def _append_result(self, message: str):
-        """Append message to results text area."""
+        """Append message to results text area (safe to call from worker threads)."""
+        self._msg_q.put(("append", message))
+    
+    def _call_in_main(self, func, *args):
+        """Run func(*args) on the main thread (safe to call from worker threads)."""
+        self._msg_q.put(("call", func, args))
+    
+    def _pump(self):
+        """Apply queued worker messages to the widgets, then re-arm."""
+        # Result lines are coalesced so each tick costs one Text insert, and
+        # only the latest status and progress of a tick are rendered
+        lines = []
+        status = progress = None
+        for _ in range(_PUMP_BATCH):
+            try:
+                item = self._msg_q.get_nowait()
+            except queue.Empty:
+                break
+            
+            kind = item[0]
+            if kind == "append":
+                lines.append(item[1])
+            elif kind == "status":
+                status = item[1]
+            elif kind == "progress":
+                progress = item[1]
+            elif kind == "call":
+                # Show queued updates before e.g. a modal message box
+                self._apply_updates(lines, status, progress)
+                lines = []
+                status = progress = None
+                item[1](*item[2])
+        
+        self._apply_updates(lines, status, progress)
+        self.root.after(_PUMP_INTERVAL_MS, self._pump)
+    
+    def _apply_updates(self, lines, status: Optional[str], progress: Optional[float]):
+        """
+        Render coalesced worker updates.
+        
+        Args:
+            lines: Result lines to append
+            status: Latest status text, or None if unchanged
+            progress: Latest progress fraction, or None if unchanged
+        """
+        self._flush_results(lines)
+        if status is not None:
+            self.status_label.config(text=status)
+        if progress is not None:
+            self.progress.config(value=progress * 100)
+    
+    def _flush_results(self, lines):
+        """Append lines to the results text area in a single insert."""
+        if not lines:
+            return
+        blob = "\n".join(lines) + "\n"
+        self._line_count += blob.count("\n")
+        
         self.results_text.config(state="normal")
-        self.results_text.insert(tk.END, message + "\n")
+        self.results_text.insert(tk.END, blob)
+        if self._line_count > _MAX_RESULT_LINES:
+            excess = self._line_count - _MAX_RESULT_LINES
+            self.results_text.delete("1.0", f"{excess + 1}.0")
+            self._line_count = _MAX_RESULT_LINES
         self.results_text.see(tk.END)
         self.results_text.config(state="disabled")
-        self.root.update_idletasks()
+    
+    def _clear_results(self):
+        """Empty the results text area."""
+        self.results_text.config(state="normal")
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.config(state="disabled")
+        self._line_count = 0
+    
+    def _run_in_worker(self, func, *args):
+        """
+        Run func(*args) in the worker process, relaying its progress to the pump.
+        
+        Args:
+            func: Module-level function to call in the worker
+            *args: Picklable arguments for func
+        
+        Returns:
+            The call's result (its exception is re-raised)
+        
+        Raises:
+            BrokenProcessPool: If the worker process died; the pool is
+                discarded so the next run starts a new one
+        """
+        try:
+            executor = _get_executor()
+            progress_q = _PROGRESS_Q
+            # Drop fractions an earlier run sent after its result came back
+            while True:
+                try:
+                    progress_q.get_nowait()
+                except queue.Empty:
+                    break
+            future = executor.submit(func, *args)
+            
+            while True:
+                try:
+                    fraction = progress_q.get(timeout=_PUMP_INTERVAL_MS / 1000)
+                except queue.Empty:
+                    if future.done():
+                        break
+                    continue
+                self._msg_q.put(("progress", fraction))
+            return future.result()
+        except BrokenProcessPool:
+            _reset_executor()
+            raise
+    
+    def _finish_worker(self):
+        """Re-enable the action buttons after a worker ends."""
+        self.repair_button.config(state="normal")
+        self.upgrade_button.config(state="normal")
+        self.status_label.config(text="Ready")
     
     def _run_repair(self):
         """Run the repair process in a separate thread."""
@@ -424,12 +709,9 @@ class EpubRepairGUI:
         
         # Disable buttons and start progress
         self.repair_button.config(state="disabled")
-        if UPGRADE_AVAILABLE:
-            self.upgrade_button.config(state="disabled")
-        self.progress.start()
-        self.results_text.config(state="normal")
-        self.results_text.delete(1.0, tk.END)
-        self.results_text.config(state="disabled")
+        self.upgrade_button.config(state="disabled")
+        self.progress.config(value=0)
+        self._clear_results()
         
         thread = threading.Thread(
             target=self._repair_worker,
@@ -440,7 +722,7 @@ class EpubRepairGUI:
     
     def _run_upgrade(self):
         """Run the upgrade process in a separate thread."""
-        if not UPGRADE_AVAILABLE:
+        if not self._ensure_upgrade_loaded():
             messagebox.showerror("Error", "EPUB Upgrade module not available")
             return
         
@@ -467,10 +749,8 @@ class EpubRepairGUI:
         # Disable buttons and start progress
         self.repair_button.config(state="disabled")
         self.upgrade_button.config(state="disabled")
-        self.progress.start()
-        self.results_text.config(state="normal")
-        self.results_text.delete(1.0, tk.END)
-        self.results_text.config(state="disabled")
+        self.progress.config(value=0)
+        self._clear_results()
         
         thread = threading.Thread(
             target=self._upgrade_worker,
@@ -498,11 +778,12 @@ class EpubRepairGUI:
             self._append_result(f"Mode: {mode}")
             self._append_result("")
             
-            summary = run_repair(
-                input_path=input_path,
-                output_path=output_path,
-                mode=mode,
-                report_path=report_path
+            summary = self._run_in_worker(
+                _repair_in_worker,
+                input_path,
+                output_path,
+                mode,
+                report_path
             )
             
             self._append_result("Repair completed successfully!")
@@ -522,7 +803,8 @@ class EpubRepairGUI:
                 self._append_result(f"\nReport saved to: {report_path}")
             
             self._update_status("Repair completed successfully!")
-            messagebox.showinfo(
+            self._call_in_main(
+                messagebox.showinfo,
                 "Success",
                 f"EPUB repair completed!\n\n"
                 f"Output saved to: {output_path}\n"
@@ -533,20 +815,19 @@ class EpubRepairGUI:
             error_msg = f"Error: {e}"
             self._append_result(f"ERROR: {error_msg}")
             self._update_status("Error occurred")
-            messagebox.showerror("Error", error_msg)
-            import traceback
+            self._call_in_main(messagebox.showerror, "Error", error_msg)
             self._append_result("\nTraceback:")
-            self._append_result(traceback.format_exc())
+            self._append_result("".join(traceback.format_exception(e)))
         
         finally:
-            self.progress.stop()
-            self.repair_button.config(state="normal")
-            if UPGRADE_AVAILABLE:
-                self.upgrade_button.config(state="normal")
-            self._update_status("Ready")
+            self._call_in_main(self._finish_worker)
     
     def _upgrade_worker(self, input_path, output_path, target_version, force_rewrite, dry_run, report_path):
         """Worker thread for upgrade process."""
+        from epub_upgrade.epub_io import copy_epub, extract_epub, get_opf_path, read_version_from_zip, verify_epub_file
+        from epub_upgrade.reporting import Reporter as UpgradeReporter
+        from epub_upgrade.versioning import read_epub_version
+        
         try:
             self._update_status("Starting upgrade...")
             self._append_result("=" * 60)
@@ -563,22 +844,18 @@ class EpubRepairGUI:
             verify_epub_file(input_path)
             
             if dry_run:
-                # Dry run: only detect version
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    temp_path = Path(temp_dir)
-                    extract_epub(input_path, temp_path)
-                    opf_path = get_opf_path(temp_path)
-                    opf_tree = load_opf(opf_path)
-                    normalized_version, raw_version = detect_epub_version(opf_tree)
-                    
-                    self._append_result(f"Detected version: {raw_version} ({normalized_version})")
-                    if normalized_version == "3":
-                        self._append_result("Status: Already EPUB 3, no upgrade needed")
-                    else:
-                        self._append_result(f"Status: Would upgrade to EPUB {target_version}")
-                    
-                    self._update_status("Dry run completed")
-                    messagebox.showinfo("Dry Run", f"EPUB version detected: {raw_version}")
+                # Dry run: only detect version, reading the OPF from the archive
+                normalized_version, raw_version = read_version_from_zip(input_path)
+                
+                self._append_result(f"Detected version: {raw_version} ({normalized_version})")
+                if normalized_version == "3":
+                    self._append_result("Status: Already EPUB 3, no upgrade needed")
+                else:
+                    self._append_result(f"Status: Would upgrade to EPUB {target_version}")
+                
+                self._msg_q.put(("progress", 1.0))
+                self._update_status("Dry run completed")
+                self._call_in_main(messagebox.showinfo, "Dry Run", f"EPUB version detected: {raw_version}")
                 return
             
             # Perform upgrade
@@ -587,8 +864,7 @@ class EpubRepairGUI:
                 extract_epub(input_path, temp_path)
                 
                 opf_path = get_opf_path(temp_path)
-                opf_tree = load_opf(opf_path)
-                normalized_version, raw_version = detect_epub_version(opf_tree)
+                normalized_version, raw_version = read_epub_version(opf_path)
                 
                 reporter = UpgradeReporter()
                 reporter.set_versions(normalized_version, raw_version)
@@ -599,9 +875,15 @@ class EpubRepairGUI:
                     copy_epub(input_path, output_path)
                     reporter.note("File already EPUB 3, copied unchanged")
                 else:
-                    upgrade_to_epub3(temp_path, target_version, reporter, force_rewrite)
+                    reporter = self._run_in_worker(
+                        _upgrade_extracted,
+                        temp_path,
+                        target_version,
+                        reporter,
+                        force_rewrite,
+                        output_path
+                    )
                     reporter.set_versions(normalized_version, raw_version, target_version)
-                    repackage_epub(temp_path, output_path)
                 
                 # Print summary
                 self._append_result("Upgrade completed successfully!")
@@ -629,7 +911,8 @@ class EpubRepairGUI:
                     self._append_result(f"\nReport saved to: {report_path}")
             
             self._update_status("Upgrade completed successfully!")
-            messagebox.showinfo(
+            self._call_in_main(
+                messagebox.showinfo,
                 "Success",
                 f"EPUB upgrade completed!\n\n"
                 f"Output saved to: {output_path}"
@@ -639,16 +922,12 @@ class EpubRepairGUI:
             error_msg = f"Error: {e}"
             self._append_result(f"ERROR: {error_msg}")
             self._update_status("Error occurred")
-            messagebox.showerror("Error", error_msg)
-            import traceback
+            self._call_in_main(messagebox.showerror, "Error", error_msg)
             self._append_result("\nTraceback:")
-            self._append_result(traceback.format_exc())
+            self._append_result("".join(traceback.format_exception(e)))
         
         finally:
-            self.progress.stop()
-            self.repair_button.config(state="normal")
-            self.upgrade_button.config(state="normal")
-            self._update_status("Ready")
+            self._call_in_main(self._finish_worker)
 
 
 def main():
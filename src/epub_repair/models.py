@@ -1,11 +1,16 @@
 """Data models for EPUB structure representation."""
 
-from dataclasses import dataclass
+import os
+import sys
+from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+_XHTML_MEDIA_TYPE = sys.intern("application/xhtml+xml")
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class SpineItem:
     """Represents a spine item (reading order entry)."""
     
@@ -17,7 +22,7 @@ class SpineItem:
             raise ValueError("idref cannot be empty")
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ManifestItem:
     """Represents a manifest item (resource in EPUB)."""
     
@@ -30,16 +35,77 @@ class ManifestItem:
             raise ValueError("id cannot be empty")
         if not self.media_type:
             raise ValueError("media_type cannot be empty")
+        # A book has only a handful of distinct media types; share them
+        object.__setattr__(self, "media_type", sys.intern(self.media_type))
 
 
 @dataclass
 class EpubBook:
-    """Represents an EPUB book structure."""
+    """
+    Represents an EPUB book structure.
+    
+    The file lists, the href index and resolve_path() results are derived on
+    first use and cached; build a new EpubBook rather than mutating fields.
+    """
     
     root_path: Path
     opf_path: Path
     spine_items: List[SpineItem]
     manifest_items: Dict[str, ManifestItem]
+    _resolve_cache: Dict[str, Path] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _opf_parent_str: str = field(init=False, repr=False, compare=False)
+    _root_path_str: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Base directories for resolve_path(), as absolute strings
+        self._opf_parent_str = os.path.abspath(self.opf_path.parent)
+        self._root_path_str = os.path.abspath(self.root_path)
+    
+    @cached_property
+    def xhtml_files(self) -> List[Path]:
+        """XHTML content files in spine order (computed once)."""
+        # Compared by value: unpickling (process-pool workers) skips
+        # __post_init__, so media_type is not always the interned string
+        get_manifest_item = self.manifest_items.get
+        return [
+            spine_item.href
+            for spine_item in self.spine_items
+            if (manifest_item := get_manifest_item(spine_item.idref)) is not None
+            and manifest_item.media_type == _XHTML_MEDIA_TYPE
+        ]
+    
+    @cached_property
+    def css_files(self) -> List[Path]:
+        """CSS files referenced in manifest (computed once)."""
+        return [
+            self.resolve_path(str(manifest_item.href))
+            for manifest_item in self._by_media_type.get("text/css", ())
+        ]
+    
+    @cached_property
+    def _manifest_by_href(self) -> Dict[str, ManifestItem]:
+        return {str(item.href): item for item in self.manifest_items.values()}
+    
+    @cached_property
+    def _by_media_type(self) -> Dict[str, List[ManifestItem]]:
+        by_media_type: Dict[str, List[ManifestItem]] = {}
+        for item in self.manifest_items.values():
+            by_media_type.setdefault(item.media_type, []).append(item)
+        return by_media_type
+    
+    def get_items_by_media_type(self, media_type: str) -> List[ManifestItem]:
+        """
+        Get manifest items of one media type, in manifest order.
+        
+        Args:
+            media_type: Media type to select (e.g., "text/css")
+        
+        Returns:
+            List of matching ManifestItems
+        """
+        return list(self._by_media_type.get(media_type, ()))
     
     def get_xhtml_files(self) -> List[Path]:
         """
@@ -48,12 +114,7 @@ class EpubBook:
         Returns:
             List of absolute paths to XHTML files
         """
-        xhtml_files = []
-        for spine_item in self.spine_items:
-            manifest_item = self.manifest_items.get(spine_item.idref)
-            if manifest_item and manifest_item.media_type == "application/xhtml+xml":
-                xhtml_files.append(spine_item.href)
-        return xhtml_files
+        return list(self.xhtml_files)
     
     def get_css_files(self) -> List[Path]:
         """
@@ -62,12 +123,19 @@ class EpubBook:
         Returns:
             List of absolute paths to CSS files
         """
-        css_files = []
-        for manifest_item in self.manifest_items.values():
-            if manifest_item.media_type == "text/css":
-                css_path = self.resolve_path(str(manifest_item.href))
-                css_files.append(css_path)
-        return css_files
+        return list(self.css_files)
+    
+    def get_manifest_item_by_href(self, href: str) -> Optional[ManifestItem]:
+        """
+        Look up a manifest item by its href.
+        
+        Args:
+            href: Path relative to EPUB root, as stored in ManifestItem.href
+        
+        Returns:
+            Matching ManifestItem, or None
+        """
+        return self._manifest_by_href.get(str(Path(href)))
     
     def resolve_path(self, href: str) -> Path:
         """
@@ -79,13 +147,18 @@ class EpubBook:
         Returns:
             Absolute path resolved from root_path
         """
+        cached = self._resolve_cache.get(href)
+        if cached is not None:
+            return cached
+        
         # OPF is typically in the same directory as content or in OEBPS/
-        # Resolve href relative to OPF's parent directory
-        opf_parent = self.opf_path.parent
-        resolved = (opf_parent / href).resolve()
+        # Resolve href relative to OPF's parent directory (lexically; the
+        # extracted tree has no symlinks to follow)
+        resolved = os.path.normpath(os.path.join(self._opf_parent_str, href))
         
         # If not found, try relative to root
-        if not resolved.exists():
-            resolved = (self.root_path / href).resolve()
+        if not os.path.lexists(resolved):
+            resolved = os.path.normpath(os.path.join(self._root_path_str, href))
         
-        return resolved
+        result = self._resolve_cache[href] = Path(resolved)
+        return result
@@ -1,16 +1,43 @@
 """Reporter for collecting and outputting repair statistics."""
 
 import json
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 
 class Reporter:
-    """Collects and reports repair statistics."""
+    """
+    Collects and reports repair statistics.
+    
+    Changes are recorded as plain (file, description, details) tuples and only
+    turned into report dicts when the changes are read. Record them with
+    log_change(); the changes property is a read-only snapshot.
+    """
     
     def __init__(self):
         self.counters: Dict[str, int] = {}
-        self.changes: List[Dict[str, Any]] = []
+        self._entries: List[Tuple[str, str, Optional[Dict[str, Any]]]] = []
+        self._changes: List[Dict[str, Any]] = []
+    
+    @property
+    def changes(self) -> Tuple[Dict[str, Any], ...]:
+        """Change records (dicts with file, description and optional details)."""
+        for file_str, description, details in self._entries[len(self._changes):]:
+            change: Dict[str, Any] = {
+                "file": file_str,
+                "description": description,
+            }
+            if details:
+                change["details"] = details
+            self._changes.append(change)
+        return tuple(self._changes)
     
     def increment(self, category: str, count: int = 1) -> None:
         """
@@ -36,13 +63,29 @@ class Reporter:
             description: Human-readable description
             details: Optional additional metadata
         """
-        change = {
-            "file": str(file_path),
-            "description": description,
-        }
-        if details:
-            change["details"] = details
-        self.changes.append(change)
+        self._entries.append((sys.intern(str(file_path)), description, details))
+    
+    def log_change_fast(self, path_str: str, description: str) -> None:
+        """
+        Log a change for a file given as a string, without details.
+        
+        Args:
+            path_str: File where change occurred (already a string)
+            description: Human-readable description
+        """
+        self._entries.append((sys.intern(path_str), description, None))
+    
+    def merge(self, other: "Reporter") -> None:
+        """
+        Fold another reporter's counters and changes into this one.
+        
+        Args:
+            other: Reporter to merge (left unchanged)
+        """
+        counters = self.counters
+        for category, count in other.counters.items():
+            counters[category] = counters.get(category, 0) + count
+        self._entries.extend(other._entries)
     
     def get_summary(self) -> Dict[str, Any]:
         """
@@ -54,23 +97,47 @@ class Reporter:
             - changes: List of change records
             - total_files_modified: Count of unique files
         """
-        unique_files = set(change["file"] for change in self.changes)
         return {
             "counters": self.counters,
-            "changes": self.changes,
-            "total_files_modified": len(unique_files),
+            "changes": list(self.changes),
+            "total_files_modified": self._count_files(),
         }
     
+    def _count_files(self) -> int:
+        """Count the distinct files changes were logged for."""
+        return len({file_str for file_str, _, _ in self._entries})
+    
     def write_json(self, path: Path) -> None:
         """
         Write report as JSON.
         
+        The report is streamed one change record at a time rather than
+        building the whole summary (and its serialized form) in memory; the
+        output is the same as dumping get_summary() with indent=2.
+        
         Args:
             path: Output file path
         """
-        summary = self.get_summary()
         with open(path, "w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=2, ensure_ascii=False)
+            f.write('{\n  "counters": ')
+            f.write(_dumps_indented(self.counters).replace("\n", "\n  "))
+            f.write(',\n  "changes": ')
+            if self._entries:
+                separator = "[\n    "
+                for file_str, description, details in self._entries:
+                    change: Dict[str, Any] = {
+                        "file": file_str,
+                        "description": description,
+                    }
+                    if details:
+                        change["details"] = details
+                    f.write(separator)
+                    f.write(_dumps_indented(change).replace("\n", "\n    "))
+                    separator = ",\n    "
+                f.write("\n  ]")
+            else:
+                f.write("[]")
+            f.write(f',\n  "total_files_modified": {self._count_files()}\n}}')
     
     def write_text(self, path: Path) -> None:
         """
@@ -79,32 +146,39 @@ class Reporter:
         Args:
             path: Output file path
         """
-        summary = self.get_summary()
-        
         with open(path, "w", encoding="utf-8") as f:
             f.write("EPUB Repair Report\n")
             f.write("=" * 50 + "\n\n")
             
             f.write("Summary:\n")
-            if summary["counters"]:
-                for category, count in sorted(summary["counters"].items()):
+            if self.counters:
+                for category, count in sorted(self.counters.items()):
                     f.write(f"  - {category}: {count}\n")
             else:
                 f.write("  (No changes recorded)\n")
             
-            f.write(f"\nTotal files modified: {summary['total_files_modified']}\n\n")
+            f.write(f"\nTotal files modified: {self._count_files()}\n\n")
             
-            if summary["changes"]:
+            if self._entries:
                 f.write("Changes by file:\n")
-                # Group changes by file
+                # Group changes by file (straight from the entries; the
+                # change dicts are not needed here)
                 changes_by_file: Dict[str, List[str]] = {}
-                for change in summary["changes"]:
-                    file_path = change["file"]
-                    if file_path not in changes_by_file:
-                        changes_by_file[file_path] = []
-                    changes_by_file[file_path].append(change["description"])
+                for file_path, description, _ in self._entries:
+                    changes_by_file.setdefault(file_path, []).append(description)
                 
                 for file_path, descriptions in sorted(changes_by_file.items()):
                     f.write(f"\n  {file_path}:\n")
                     for desc in descriptions:
                         f.write(f"    - {desc}\n")
+
+
+def _dumps_indented(value: Any) -> str:
+    """Serialize one report value as JSON indented by two spaces."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            value,
+            default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+        ).decode("utf-8")
+    return json.dumps(value, indent=2, ensure_ascii=False)
@@ -1,6 +1,22 @@
 """Rule engine for EPUB formatting repair."""
 
 from . import breaks, css_cleanup, headings, images, lists, paragraphs
+from .pipeline import TreeRule, apply_tree_rules
+
+__all__ = [
+    "AGGRESSIVE_RULES",
+    "PER_FILE_RULES",
+    "SAFE_RULES",
+    "TREE_RULES",
+    "TreeRule",
+    "apply_tree_rules",
+    "breaks",
+    "css_cleanup",
+    "headings",
+    "images",
+    "lists",
+    "paragraphs",
+]
 
 # Safe rules - conservative formatting fixes
 SAFE_RULES = [
@@ -16,3 +32,16 @@ SAFE_RULES = [
 AGGRESSIVE_RULES = SAFE_RULES + [
     css_cleanup.simplify_css_aggressive,
 ]
+
+# Rules that only touch spine XHTML documents and handle each file
+# independently, so different files may be processed concurrently. Each
+# maps to its TreeRule, which lets several of them share one parse of a file
+# (see apply_tree_rules).
+TREE_RULES = {
+    headings.normalize_headings: headings.TREE_RULE,
+    paragraphs.normalize_paragraphs_and_indents: paragraphs.TREE_RULE,
+    lists.normalize_lists: lists.TREE_RULE,
+    breaks.normalize_context_breaks: breaks.TREE_RULE,
+    images.normalize_images: images.TREE_RULE,
+}
+PER_FILE_RULES = frozenset(TREE_RULES)
@@ -1,9 +1,22 @@
 """Rule for cleaning up and simplifying CSS."""
 
+from typing import Optional
+
+try:
+    import tinycss2
+except ImportError:
+    # parse_css() reports the missing dependency
+    tinycss2 = None
+
 from ..models import EpubBook
 from ..reporting import Reporter
 from ..css_processor import parse_css, serialize_css
 
+# Property names each cleanup acts on; stylesheets mentioning none of them
+# are not parsed at all
+_SAFE_PROPERTY_NAMES = (b"font-size", b"line-height", b"display")
+_AGGRESSIVE_PROPERTY_NAMES = (b"font-family",)
+
 
 def simplify_css_safe(book: EpubBook, reporter: Reporter) -> None:
     """
@@ -22,46 +35,24 @@ def simplify_css_safe(book: EpubBook, reporter: Reporter) -> None:
             continue
         
         try:
-            css_text = css_path.read_text(encoding="utf-8")
+            css_text = _read_css_mentioning(css_path, _SAFE_PROPERTY_NAMES)
+            if css_text is None:
+                continue
             rules = parse_css(css_text)
             changed = False
             
-            # Remove aggressive font-size on body/html
-            for rule in rules:
-                if hasattr(rule, "prelude"):
-                    selector_text = _get_selector_text(rule)
-                    if selector_text in ("body", "html"):
-                        if hasattr(rule, "content"):
-                            original_count = len(rule.content)
-                            rule.content = [
-                                decl for decl in rule.content
-                                if not (hasattr(decl, "name") and decl.name == "font-size" and _is_absolute_size(decl))
-                            ]
-                            removed = original_count - len(rule.content)
-                            if removed > 0:
-                                properties_removed += removed
-                                changed = True
-            
-            # Remove fixed line-height
-            for rule in rules:
-                if hasattr(rule, "content"):
-                    original_count = len(rule.content)
-                    rule.content = [
-                        decl for decl in rule.content
-                        if not (hasattr(decl, "name") and decl.name == "line-height" and _is_fixed_line_height(decl))
-                    ]
-                    removed = original_count - len(rule.content)
-                    if removed > 0:
-                        properties_removed += removed
-                        changed = True
-            
-            # Remove display: flex/grid
+            # Remove aggressive font-size on body/html, fixed line-height and
+            # display: flex/grid in a single pass over each rule
             for rule in rules:
                 if hasattr(rule, "content"):
+                    is_root_selector = (
+                        hasattr(rule, "prelude")
+                        and _get_selector_text(rule) in ("body", "html")
+                    )
                     original_count = len(rule.content)
                     rule.content = [
                         decl for decl in rule.content
-                        if not (hasattr(decl, "name") and decl.name == "display" and _is_flex_or_grid(decl))
+                        if _keep_safe_declaration(decl, is_root_selector)
                     ]
                     removed = original_count - len(rule.content)
                     if removed > 0:
@@ -70,7 +61,7 @@ def simplify_css_safe(book: EpubBook, reporter: Reporter) -> None:
             
             if changed:
                 new_css = serialize_css(rules)
-                css_path.write_text(new_css, encoding="utf-8")
+                css_path.write_bytes(new_css.encode("utf-8"))
                 reporter.log_change(css_path, f"Removed {properties_removed} aggressive CSS properties")
         
         except Exception as e:
@@ -95,7 +86,9 @@ def simplify_css_aggressive(book: EpubBook, reporter: Reporter) -> None:
             continue
         
         try:
-            css_text = css_path.read_text(encoding="utf-8")
+            css_text = _read_css_mentioning(css_path, _AGGRESSIVE_PROPERTY_NAMES)
+            if css_text is None:
+                continue
             rules = parse_css(css_text)
             changed = False
             
@@ -117,7 +110,7 @@ def simplify_css_aggressive(book: EpubBook, reporter: Reporter) -> None:
             
             if changed:
                 new_css = serialize_css(rules)
-                css_path.write_text(new_css, encoding="utf-8")
+                css_path.write_bytes(new_css.encode("utf-8"))
                 reporter.log_change(css_path, f"Removed {font_families_removed} font-family declarations")
         
         except Exception as e:
@@ -127,10 +120,49 @@ def simplify_css_aggressive(book: EpubBook, reporter: Reporter) -> None:
     reporter.increment("css.removed_font_faces", font_faces_removed)
 
 
+def _read_css_mentioning(css_path, property_names) -> Optional[str]:
+    """
+    Read a stylesheet, unless it cannot contain any of the given properties.
+    
+    Args:
+        css_path: Path to CSS file
+        property_names: Property names as bytes
+    
+    Returns:
+        CSS text (newlines normalized as by Path.read_text), or None if
+        none of the names occur in the file
+    """
+    raw = css_path.read_bytes()
+    if not any(name in raw for name in property_names):
+        return None
+    return raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _keep_safe_declaration(decl, is_root_selector: bool) -> bool:
+    """
+    Check whether simplify_css_safe() keeps a declaration.
+    
+    Args:
+        decl: Declaration (or token) from a rule's content
+        is_root_selector: Whether the rule's selector is body or html
+    
+    Returns:
+        False for absolute font-size on body/html, fixed line-height and
+        display: flex/grid; True otherwise
+    """
+    name = getattr(decl, "name", None)
+    if name == "font-size":
+        return not (is_root_selector and _is_absolute_size(decl))
+    if name == "line-height":
+        return not _is_fixed_line_height(decl)
+    if name == "display":
+        return not _is_flex_or_grid(decl)
+    return True
+
+
 def _get_selector_text(rule) -> str:
     """Get selector text from rule (simplified)."""
     try:
-        import tinycss2
         return tinycss2.serialize(rule.prelude).strip()
     except:
         return ""
@@ -1,8 +1,41 @@
 """Rule for normalizing headings to semantic HTML."""
 
+import re
+from pathlib import Path
+
+from lxml import etree
+
 from ..models import EpubBook
 from ..reporting import Reporter
-from ..xhtml_parser import find_headings, parse_xhtml, serialize_xhtml
+from .pipeline import TreeRule, apply_tree_rules
+
+# Substrings of a paragraph's class attribute that mark a fake heading
+_HEADING_CLASS_WORDS = ("heading", "chapter", "section", "title")
+_XP_NESTED_HEADINGS = etree.XPath(
+    "//p//h1 | //p//h2 | //p//h3 | //p//h4 | //p//h5 | //p//h6"
+)
+
+_HEADING_TAG_RE = re.compile(rb"<h[1-6]", re.IGNORECASE)
+_PARAGRAPH_TAG_RE = re.compile(rb"<p\b", re.IGNORECASE)
+
+
+def _may_need_headings(raw: bytes) -> bool:
+    """
+    Cheap check on raw XHTML for anything normalize_headings() acts on.
+    
+    Args:
+        raw: File content
+    
+    Returns:
+        False only if the document has no heading-like class names and no
+        heading tags alongside paragraphs
+    """
+    if b"heading" in raw or b"chapter" in raw or b"section" in raw:
+        return True
+    # Every document has a <title> element; only other occurrences count
+    if raw.count(b"title") > raw.count(b"<title") + raw.count(b"</title"):
+        return True
+    return bool(_HEADING_TAG_RE.search(raw) and _PARAGRAPH_TAG_RE.search(raw))
 
 
 def normalize_headings(book: EpubBook, reporter: Reporter) -> None:
@@ -13,61 +46,64 @@ def normalize_headings(book: EpubBook, reporter: Reporter) -> None:
     to proper semantic headings. Ensures proper heading hierarchy and
     fixes nesting issues.
     """
+    apply_tree_rules([TREE_RULE], book, reporter)
+
+
+def apply_headings(tree: etree._Element, reporter: Reporter, xhtml_path: Path) -> bool:
+    """
+    Apply normalize_headings() to one parsed document.
+    
+    Args:
+        tree: Root element (modified in place)
+        reporter: Reporter collecting counters and changes
+        xhtml_path: File the tree was parsed from
+    
+    Returns:
+        True if the tree was changed
+    """
     converted_count = 0
     nesting_fixes = 0
     
-    for xhtml_path in book.get_xhtml_files():
-        if not xhtml_path.exists():
-            reporter.log_change(xhtml_path, f"File not found, skipping")
-            continue
-        
-        try:
-            tree = parse_xhtml(xhtml_path)
-            
-            # Find fake headings (paragraphs with heading-like classes)
-            fake_heading_patterns = [
-                "//p[contains(@class, 'heading')]",
-                "//p[contains(@class, 'chapter')]",
-                "//p[contains(@class, 'section')]",
-                "//p[contains(@class, 'title')]",
-            ]
-            
-            for pattern in fake_heading_patterns:
-                fake_headings = tree.xpath(pattern)
-                for p_elem in fake_headings:
-                    # Determine heading level based on class
-                    level = _determine_heading_level(p_elem)
-                    if level:
-                        # Convert to semantic heading
-                        _convert_to_heading(p_elem, level, tree)
-                        converted_count += 1
-            
-            # Fix nested headings
-            nested_headings = tree.xpath("//p//h1 | //p//h2 | //p//h3 | //p//h4 | //p//h5 | //p//h6")
-            for heading in nested_headings:
-                parent = heading.getparent()
-                if parent is not None and parent.tag == "p":
-                    # Move heading out of paragraph
-                    parent.addprevious(heading)
-                    # Remove empty paragraph if it has no other content
-                    if not parent.text and len(parent) == 0:
-                        parent.getparent().remove(parent)
-                    nesting_fixes += 1
-            
-            # Write back if changes were made
-            if converted_count > 0 or nesting_fixes > 0:
-                xhtml_content = serialize_xhtml(tree)
-                xhtml_path.write_text(xhtml_content, encoding="utf-8")
-                reporter.log_change(
-                    xhtml_path,
-                    f"Converted {converted_count} fake headings, fixed {nesting_fixes} nesting issues"
-                )
-        
-        except Exception as e:
-            reporter.log_change(xhtml_path, f"Error processing: {e}")
+    # Find fake headings (paragraphs with heading-like classes); the list is
+    # complete before any paragraph is replaced
+    fake_headings = [
+        p_elem for p_elem in tree.iter("p")
+        if _has_heading_class(p_elem.get("class"))
+    ]
+    for p_elem in fake_headings:
+        # Determine heading level based on class
+        level = _determine_heading_level(p_elem)
+        if level:
+            # Convert to semantic heading
+            _convert_to_heading(p_elem, level, tree)
+            converted_count += 1
+    
+    # Fix nested headings
+    nested_headings = _XP_NESTED_HEADINGS(tree)
+    for heading in nested_headings:
+        parent = heading.getparent()
+        if parent is not None and parent.tag == "p":
+            # Move heading out of paragraph
+            parent.addprevious(heading)
+            # Remove empty paragraph if it has no other content
+            if not parent.text and len(parent) == 0:
+                parent.getparent().remove(parent)
+            nesting_fixes += 1
     
     reporter.increment("headings.converted_fake_headings", converted_count)
     reporter.increment("headings.fixed_nesting", nesting_fixes)
+    if converted_count > 0 or nesting_fixes > 0:
+        reporter.log_change(
+            xhtml_path,
+            f"Converted {converted_count} fake headings, fixed {nesting_fixes} nesting issues"
+        )
+        return True
+    return False
+
+
+def _has_heading_class(classes) -> bool:
+    """Check whether a class attribute value marks a fake heading."""
+    return bool(classes) and any(word in classes for word in _HEADING_CLASS_WORDS)
 
 
 def _determine_heading_level(element) -> int:
@@ -87,8 +123,6 @@ def _determine_heading_level(element) -> int:
 
 def _convert_to_heading(element, level: int, tree) -> None:
     """Convert a paragraph element to a heading element."""
-    from lxml import etree
-    
     # Create new heading element
     tag = f"h{level}"
     heading = etree.Element(tag)
@@ -114,3 +148,10 @@ def _convert_to_heading(element, level: int, tree) -> None:
     parent = element.getparent()
     if parent is not None:
         parent.replace(element, heading)
+
+
+TREE_RULE = TreeRule(
+    apply=apply_headings,
+    may_apply=_may_need_headings,
+    counters=("headings.converted_fake_headings", "headings.fixed_nesting"),
+)
@@ -1,8 +1,16 @@
 """Rule for normalizing images."""
 
+import re
+from pathlib import Path
+
+from lxml import etree
+
 from ..models import EpubBook
 from ..reporting import Reporter
-from ..xhtml_parser import parse_xhtml, serialize_xhtml
+from .pipeline import TreeRule, apply_tree_rules
+
+# Documents without an <img tag are left unparsed
+_IMG_TAG_RE = re.compile(rb"<img\b", re.IGNORECASE)
 
 
 def normalize_images(book: EpubBook, reporter: Reporter) -> None:
@@ -12,36 +20,48 @@ def normalize_images(book: EpubBook, reporter: Reporter) -> None:
     - Ensures <img> tags have alt attributes
     - Normalizes width/height attributes (prefer CSS)
     """
+    apply_tree_rules([TREE_RULE], book, reporter)
+
+
+def apply_images(tree: etree._Element, reporter: Reporter, xhtml_path: Path) -> bool:
+    """
+    Apply normalize_images() to one parsed document.
+    
+    Args:
+        tree: Root element (modified in place)
+        reporter: Reporter collecting counters and changes
+        xhtml_path: File the tree was parsed from
+    
+    Returns:
+        True if the tree was changed
+    """
     alt_added = 0
     
-    for xhtml_path in book.get_xhtml_files():
-        if not xhtml_path.exists():
-            continue
+    for img in tree.iter("img"):
+        # Add alt attribute if missing
+        if "alt" not in img.attrib:
+            img.set("alt", "")
+            alt_added += 1
         
-        try:
-            tree = parse_xhtml(xhtml_path)
-            images = tree.xpath("//img")
-            changed = False
-            
-            for img in images:
-                # Add alt attribute if missing
-                if "alt" not in img.attrib:
-                    img.set("alt", "")
-                    alt_added += 1
-                    changed = True
-                
-                # Remove fixed width/height attributes (will be handled by CSS)
-                # Note: We keep them for now but could remove if CSS rule is added
-                if "width" in img.attrib or "height" in img.attrib:
-                    # Could remove here, but keeping for compatibility
-                    pass
-            
-            if changed:
-                xhtml_content = serialize_xhtml(tree)
-                xhtml_path.write_text(xhtml_content, encoding="utf-8")
-                reporter.log_change(xhtml_path, f"Added {alt_added} alt attributes")
-        
-        except Exception as e:
-            reporter.log_change(xhtml_path, f"Error processing: {e}")
+        # Remove fixed width/height attributes (will be handled by CSS)
+        # Note: We keep them for now but could remove if CSS rule is added
+        if "width" in img.attrib or "height" in img.attrib:
+            # Could remove here, but keeping for compatibility
+            pass
     
     reporter.increment("images.added_alt", alt_added)
+    if alt_added:
+        reporter.log_change(xhtml_path, f"Added {alt_added} alt attributes")
+    return alt_added > 0
+
+
+def _may_need_images(raw: bytes) -> bool:
+    """Cheap check on raw XHTML for an <img> tag."""
+    return bool(_IMG_TAG_RE.search(raw))
+
+
+TREE_RULE = TreeRule(
+    apply=apply_images,
+    may_apply=_may_need_images,
+    counters=("images.added_alt",),
+)
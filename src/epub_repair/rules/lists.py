@@ -1,9 +1,31 @@
 """Rule for normalizing lists to semantic HTML."""
 
 import re
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Optional, Tuple
+
+from lxml import etree
+
 from ..models import EpubBook
 from ..reporting import Reporter
-from ..xhtml_parser import find_paragraphs, parse_xhtml, serialize_xhtml
+from ..xhtml_parser import find_paragraphs
+from .pipeline import TreeRule, apply_tree_rules
+
+# A paragraph (or a div, which the paragraph rule may turn into one) whose
+# text starts with a possible list marker: "-", "*", a digit, an entity or
+# any non-ASCII character (bullets, Unicode digits and spaces). Documents
+# without one are left unparsed
+_LIST_CANDIDATE_RE = re.compile(
+    rb"<(?:p|div)\b(?:[^>\"']|\"[^\"]*\"|'[^']*')*>[\s\x1c-\x1f]*[-*&0-9\x80-\xff]",
+    re.IGNORECASE
+)
+
+# Bullet / number prefixes of list-like paragraphs
+_BULLETS = frozenset("-•*")
+_UNORDERED_RE = re.compile(r'^[-•*]\s+')
+_ORDERED_RE = re.compile(r'^\d+\.\s+')
 
 
 def normalize_lists(book: EpubBook, reporter: Reporter) -> None:
@@ -13,96 +35,96 @@ def normalize_lists(book: EpubBook, reporter: Reporter) -> None:
     Detects paragraphs that look like lists and groups them into
     proper <ul>/<ol> structures.
     """
+    apply_tree_rules([TREE_RULE], book, reporter)
+
+
+def apply_lists(tree: etree._Element, reporter: Reporter, xhtml_path: Path) -> bool:
+    """
+    Apply normalize_lists() to one parsed document.
+    
+    Args:
+        tree: Root element (modified in place)
+        reporter: Reporter collecting counters and changes
+        xhtml_path: File the tree was parsed from
+    
+    Returns:
+        True if the tree was changed
+    """
     lists_created = 0
     
-    for xhtml_path in book.get_xhtml_files():
-        if not xhtml_path.exists():
+    # Each paragraph's text is checked once: (paragraph, list kind, text
+    # without its bullet/number prefix)
+    items = []
+    for p in find_paragraphs(tree):
+        text = (p.text or "").strip()
+        ordered, prefix_end = _list_marker(text)
+        items.append((p, ordered, text[prefix_end:]))
+    
+    # Runs of consecutive list-like paragraphs of the same kind become lists
+    for ordered, run in groupby(items, key=itemgetter(1)):
+        if ordered is None:
             continue
+        run = list(run)
         
-        try:
-            tree = parse_xhtml(xhtml_path)
-            paragraphs = find_paragraphs(tree)
+        # Create list element, in place of the first paragraph
+        list_elem = etree.Element("ol" if ordered else "ul")
+        run[0][0].addprevious(list_elem)
+        
+        # Convert paragraphs to list items
+        for p_elem, _, text_content in run:
+            li = etree.Element("li")
+            li.text = text_content
             
-            # Pattern to detect list-like paragraphs
-            unordered_pattern = re.compile(r'^[-•*]\s+')
-            ordered_pattern = re.compile(r'^\d+\.\s+')
+            # Copy children
+            for child in p_elem:
+                li.append(child)
             
-            i = 0
-            while i < len(paragraphs):
-                p = paragraphs[i]
-                text = (p.text or "").strip()
-                
-                # Check if this paragraph looks like a list item
-                is_unordered = bool(unordered_pattern.match(text))
-                is_ordered = bool(ordered_pattern.match(text))
-                
-                if is_unordered or is_ordered:
-                    # Find consecutive list-like paragraphs
-                    list_items = []
-                    j = i
-                    while j < len(paragraphs):
-                        p_item = paragraphs[j]
-                        text_item = (p_item.text or "").strip()
-                        
-                        if is_unordered and unordered_pattern.match(text_item):
-                            list_items.append((p_item, False))
-                            j += 1
-                        elif is_ordered and ordered_pattern.match(text_item):
-                            list_items.append((p_item, True))
-                            j += 1
-                        else:
-                            break
-                    
-                    if list_items:
-                        # Create list element
-                        from lxml import etree
-                        list_tag = "ol" if is_ordered else "ul"
-                        list_elem = etree.Element(list_tag)
-                        
-                        # Convert paragraphs to list items
-                        for p_elem, was_ordered in list_items:
-                            li = etree.Element("li")
-                            
-                            # Remove bullet/number prefix
-                            text_content = (p_elem.text or "").strip()
-                            if was_ordered:
-                                text_content = re.sub(r'^\d+\.\s+', '', text_content)
-                            else:
-                                text_content = re.sub(r'^[-•*]\s+', '', text_content)
-                            
-                            li.text = text_content
-                            
-                            # Copy children
-                            for child in p_elem:
-                                li.append(child)
-                            
-                            list_elem.append(li)
-                            
-                            # Remove original paragraph
-                            parent = p_elem.getparent()
-                            if parent is not None:
-                                parent.remove(p_elem)
-                        
-                        # Insert list before first removed paragraph's position
-                        if list_items:
-                            first_p = list_items[0][0]
-                            parent = first_p.getparent()
-                            if parent is not None:
-                                # Find insertion point (before next sibling or at end)
-                                parent.insert(parent.index(first_p) if first_p in parent else len(parent), list_elem)
-                        
-                        lists_created += 1
-                        i = j
-                        continue
-                
-                i += 1
+            list_elem.append(li)
             
-            if lists_created > 0:
-                xhtml_content = serialize_xhtml(tree)
-                xhtml_path.write_text(xhtml_content, encoding="utf-8")
-                reporter.log_change(xhtml_path, f"Created {lists_created} semantic lists")
+            # Remove original paragraph
+            p_elem.getparent().remove(p_elem)
         
-        except Exception as e:
-            reporter.log_change(xhtml_path, f"Error processing: {e}")
+        lists_created += 1
     
     reporter.increment("lists.converted_paragraphs", lists_created)
+    if lists_created > 0:
+        reporter.log_change(xhtml_path, f"Created {lists_created} semantic lists")
+        return True
+    return False
+
+
+def _list_marker(text: str) -> Tuple[Optional[bool], int]:
+    """
+    Check whether stripped paragraph text starts like a list item.
+    
+    Args:
+        text: Paragraph text, stripped
+    
+    Returns:
+        Tuple of (True for a number, False for a bullet, None for neither;
+        length of the prefix to drop)
+    """
+    # Nearly all paragraphs start with neither, so the first character
+    # decides which pattern, if any, is worth matching
+    first = text[:1]
+    if first in _BULLETS:
+        match = _UNORDERED_RE.match(text)
+        if match:
+            return False, match.end()
+    elif first.isdecimal():
+        match = _ORDERED_RE.match(text)
+        if match:
+            return True, match.end()
+    return None, 0
+
+
+def _may_need_lists(raw: bytes) -> bool:
+    """Cheap check on raw XHTML for a paragraph that could be a list item."""
+    return bool(_LIST_CANDIDATE_RE.search(raw))
+
+
+TREE_RULE = TreeRule(
+    apply=apply_lists,
+    may_apply=_may_need_lists,
+    counters=("lists.converted_paragraphs",),
+)
@@ -1,8 +1,18 @@
 """Rule for normalizing paragraph structure and indentation."""
 
+import re
+from pathlib import Path
+
+from lxml import etree
+
 from ..models import EpubBook
 from ..reporting import Reporter
-from ..xhtml_parser import find_paragraphs, parse_xhtml, serialize_xhtml
+from .pipeline import TreeRule, apply_tree_rules
+
+# Documents without a <div> or <br> tag are left unparsed
+_DIV_OR_BR_TAG_RE = re.compile(rb"<(?:div|br)\b", re.IGNORECASE)
+
+_INLINE_TAGS = frozenset(["span", "em", "strong"])
 
 
 def normalize_paragraphs_and_indents(book: EpubBook, reporter: Reporter) -> None:
@@ -13,52 +23,93 @@ def normalize_paragraphs_and_indents(book: EpubBook, reporter: Reporter) -> None
     - Removes multiple consecutive <br/> tags
     - Normalizes indentation (moves inline styles to CSS)
     """
+    apply_tree_rules([TREE_RULE], book, reporter)
+
+
+def apply_paragraphs_and_indents(tree: etree._Element, reporter: Reporter, xhtml_path: Path) -> bool:
+    """
+    Apply normalize_paragraphs_and_indents() to one parsed document.
+    
+    Args:
+        tree: Root element (modified in place)
+        reporter: Reporter collecting counters and changes
+        xhtml_path: File the tree was parsed from
+    
+    Returns:
+        True if the tree was changed
+    """
     divs_converted = 0
     br_removed = 0
     
-    for xhtml_path in book.get_xhtml_files():
-        if not xhtml_path.exists():
+    # One walk finds the divs to convert and the <br/> children of each
+    # parent
+    text_divs = []
+    brs_by_parent = {}
+    for elem in tree.iter("div", "br"):
+        if elem.tag == "div":
+            if _is_text_div(elem):
+                text_divs.append(elem)
             continue
-        
-        try:
-            tree = parse_xhtml(xhtml_path)
-            changed = False
-            
-            # Convert divs to paragraphs (conservative: only if they contain inline/text content)
-            divs = tree.xpath("//div[not(div) and not(p) and (text() or span or em or strong)]")
-            for div in divs:
-                div.tag = "p"
-                divs_converted += 1
-                changed = True
-            
-            # Remove multiple consecutive <br/> tags
-            br_sequences = tree.xpath("//br/following-sibling::br")
-            for br in br_sequences:
-                parent = br.getparent()
-                if parent is not None:
-                    parent.remove(br)
-                    br_removed += 1
-                    changed = True
-            
-            # Remove <br/> at end of paragraphs
-            trailing_brs = tree.xpath("//p/br[last()]")
-            for br in trailing_brs:
-                parent = br.getparent()
-                if parent is not None:
-                    parent.remove(br)
-                    br_removed += 1
-                    changed = True
-            
-            if changed:
-                xhtml_content = serialize_xhtml(tree)
-                xhtml_path.write_text(xhtml_content, encoding="utf-8")
-                reporter.log_change(
-                    xhtml_path,
-                    f"Converted {divs_converted} divs, removed {br_removed} <br/> tags"
-                )
-        
-        except Exception as e:
-            reporter.log_change(xhtml_path, f"Error processing: {e}")
+        parent = elem.getparent()
+        if parent is not None:
+            brs_by_parent.setdefault(parent, []).append(elem)
+    
+    # Convert divs to paragraphs (conservative: only if they contain inline/text content)
+    for div in text_divs:
+        div.tag = "p"
+        divs_converted += 1
+    
+    # Remove multiple consecutive <br/> tags (every <br/> after the first
+    # one among its siblings) and the <br/> left at the end of paragraphs,
+    # including paragraphs converted from divs above
+    for parent, brs in brs_by_parent.items():
+        start = 0 if parent.tag == "p" else 1
+        for br in brs[start:]:
+            parent.remove(br)
+        br_removed += len(brs) - start
     
+    changed = divs_converted > 0 or br_removed > 0
     reporter.increment("paragraphs.converted_divs", divs_converted)
     reporter.increment("paragraphs.removed_br_breaks", br_removed)
+    if changed:
+        reporter.log_change(
+            xhtml_path,
+            f"Converted {divs_converted} divs, removed {br_removed} <br/> tags"
+        )
+    return changed
+
+
+def _is_text_div(div) -> bool:
+    """
+    Check whether a div holds only inline content and can become a paragraph.
+    
+    Same test as the XPath predicate
+    div[not(div) and not(p) and (text() or span or em or strong)].
+    
+    Args:
+        div: div element
+    
+    Returns:
+        True if the div has no div/p children and has text or a span, em or
+        strong child
+    """
+    has_content = bool(div.text)
+    for child in div:
+        tag = child.tag
+        if tag == "div" or tag == "p":
+            return False
+        if child.tail or tag in _INLINE_TAGS:
+            has_content = True
+    return has_content
+
+
+def _may_need_paragraphs(raw: bytes) -> bool:
+    """Cheap check on raw XHTML for a <div> or <br> tag."""
+    return bool(_DIV_OR_BR_TAG_RE.search(raw))
+
+
+TREE_RULE = TreeRule(
+    apply=apply_paragraphs_and_indents,
+    may_apply=_may_need_paragraphs,
+    counters=("paragraphs.converted_divs", "paragraphs.removed_br_breaks"),
+)
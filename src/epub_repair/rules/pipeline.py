@@ -0,0 +1,135 @@
+"""Per-file rule pipeline: one parse and at most one write per XHTML file."""
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from lxml import etree
+
+from ..models import EpubBook
+from ..reporting import Reporter
+from ..xhtml_parser import parse_xhtml_bytes, serialize_xhtml_bytes
+
+_HTML_TAG_RE = re.compile(rb"<html\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class TreeRule:
+    """A per-file rule that works on an already parsed document."""
+    
+    # Mutates the tree in place, logs and counts its changes, and returns
+    # whether anything changed: apply(tree, reporter, xhtml_path)
+    apply: Callable[[etree._Element, Reporter, Path], bool]
+    # Cheap check on the raw file content; False means apply() would find
+    # nothing to change
+    may_apply: Callable[[bytes], bool]
+    # Counter categories the rule reports (zero when nothing changed)
+    counters: Tuple[str, ...]
+
+
+def apply_tree_rules(rules: List[TreeRule], book: EpubBook, reporter: Reporter) -> None:
+    """
+    Apply per-file rules to each XHTML file of a book.
+    
+    Each file is read and scanned once, parsed once if any rule may change
+    it, handed to the rules in order and written back once if any of them
+    changed it.
+    
+    Args:
+        rules: Rules to apply, in order
+        book: Book (or single-file view of a book) to repair
+        reporter: Reporter collecting counters and changes
+    """
+    # Counters are reported even when no file needs a rule
+    for rule in rules:
+        for category in rule.counters:
+            reporter.increment(category, 0)
+    
+    for xhtml_path in book.get_xhtml_files():
+        if not xhtml_path.exists():
+            reporter.log_change(xhtml_path, "File not found, skipping")
+            continue
+        
+        try:
+            raw = xhtml_path.read_bytes()
+            applicable = _applicable_rules(rules, raw)
+            if not applicable:
+                continue
+            tree = _apply_to_document(applicable, raw, reporter, xhtml_path)
+            if tree is not None:
+                xhtml_path.write_bytes(serialize_xhtml_bytes(tree))
+        except Exception as e:
+            reporter.log_change(xhtml_path, f"Error processing: {e}")
+
+
+def _apply_to_document(
+    rules: List[TreeRule],
+    raw: bytes,
+    reporter: Reporter,
+    xhtml_path: Path
+) -> Optional[etree._Element]:
+    """
+    Parse one document and run rules over the tree.
+    
+    A rule that raises may leave the tree half-changed, so the document is
+    parsed again and the rules rerun without it. As when each rule parsed
+    the file itself, a failing rule contributes only its error.
+    
+    Args:
+        rules: Rules to apply, in order
+        raw: XHTML file content
+        reporter: Reporter collecting counters and changes
+        xhtml_path: File the content was read from
+    
+    Returns:
+        Changed tree, or None if no rule changed the document
+    """
+    failed: Dict[TreeRule, Exception] = {}
+    while True:
+        tree = parse_xhtml_bytes(raw)
+        attempt = Reporter()
+        changed = False
+        for rule in rules:
+            if rule in failed:
+                attempt.log_change(xhtml_path, f"Error processing: {failed[rule]}")
+                continue
+            try:
+                if rule.apply(tree, attempt, xhtml_path):
+                    changed = True
+            except Exception as e:
+                failed[rule] = e
+                break
+        else:
+            reporter.merge(attempt)
+            return tree if changed else None
+
+
+def _applicable_rules(rules: List[TreeRule], raw: bytes) -> List[TreeRule]:
+    """
+    Select the rules that may change a document, from its raw bytes.
+    
+    Args:
+        rules: Candidate rules, in order
+        raw: XHTML file content
+    
+    Returns:
+        Rules whose may_apply() accepts the content, in order
+    """
+    # The parser wraps bare fragments in elements of its own, which the
+    # byte checks cannot see, and undecodable content must reach the
+    # parser so its error is reported
+    if not _HTML_TAG_RE.search(raw) or not _is_utf8(raw):
+        return list(rules)
+    return [rule for rule in rules if rule.may_apply(raw)]
+
+
+def _is_utf8(raw: bytes) -> bool:
+    """Check whether raw decodes as UTF-8."""
+    if raw.isascii():
+        return True
+    try:
+        raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+    return True
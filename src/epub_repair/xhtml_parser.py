@@ -1,5 +1,6 @@
 """XHTML parsing and serialization utilities."""
 
+import threading
 from pathlib import Path
 from typing import List
 
@@ -14,6 +15,16 @@ except ImportError:
     except ImportError:
         BS4_AVAILABLE = False
 
+if LXML_AVAILABLE:
+    # Queries behind the find_* helpers, compiled once
+    _XP_HEADINGS = etree.XPath(".//h1 | .//h2 | .//h3 | .//h4 | .//h5 | .//h6")
+    _XP_PARAGRAPHS = etree.XPath(".//p")
+    _XP_LISTS = etree.XPath(".//ul | .//ol")
+
+# One reusable HTML parser per thread: a shared one would make rule worker
+# threads wait on each other's parses
+_PARSERS = threading.local()
+
 
 def parse_xhtml(file_path: Path) -> etree._Element:
     """
@@ -32,29 +43,69 @@ def parse_xhtml(file_path: Path) -> etree._Element:
     
     Notes:
         - Uses lxml.html.HTMLParser with recover=True for tolerance
+        - Parses very large chapters (huge_tree) without truncating them
         - Falls back to BeautifulSoup if lxml not available
     """
+    return parse_xhtml_bytes(file_path.read_bytes())
+
+
+def parse_xhtml_bytes(raw: bytes) -> etree._Element:
+    """
+    Parse XHTML content already read from disk.
+    
+    Lets a rule inspect the raw bytes first and skip parsing documents it
+    has nothing to do in; the result matches parse_xhtml() on the same file.
+    
+    Args:
+        raw: File content (UTF-8)
+    
+    Returns:
+        Root element of parsed tree
+    
+    Raises:
+        ImportError: If neither lxml nor beautifulsoup4 is available
+        UnicodeDecodeError: If content is not valid UTF-8
+    """
     if not LXML_AVAILABLE and not BS4_AVAILABLE:
         raise ImportError(
             "Either lxml or beautifulsoup4 must be installed. "
             "Install with: pip install lxml or pip install beautifulsoup4"
         )
     
-    content = file_path.read_text(encoding="utf-8")
+    # The parser would accept invalid UTF-8, so check it here (ASCII is
+    # always valid); the bytes themselves are parsed without a decode and
+    # re-encode
+    if not raw.isascii():
+        raw.decode("utf-8")
+    
+    # Same newline handling as Path.read_text() (a CR byte is only ever a
+    # CR character in UTF-8)
+    if b"\r" in raw:
+        raw = raw.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
     
     if LXML_AVAILABLE:
         # Use lxml with HTML parser for tolerance of malformed HTML
-        parser = html.HTMLParser(recover=True, encoding="utf-8")
-        tree = html.fromstring(content.encode("utf-8"), parser=parser)
+        tree = html.fromstring(raw, parser=_html_parser())
         return tree
     else:
         # Fallback to BeautifulSoup
-        soup = BeautifulSoup(content, "html.parser")
+        soup = BeautifulSoup(raw.decode("utf-8"), "html.parser")
         # Convert to lxml-like structure (simplified)
         # Note: This is a basic fallback; full implementation would need more work
         raise NotImplementedError("BeautifulSoup fallback not yet implemented")
 
 
+def _html_parser() -> "html.HTMLParser":
+    """Get this thread's HTML parser, creating it on first use."""
+    parser = getattr(_PARSERS, "parser", None)
+    if parser is None:
+        # huge_tree lifts libxml2's limits on text node size and nesting
+        # depth, past which recover=True silently drops content
+        parser = html.HTMLParser(recover=True, encoding="utf-8", huge_tree=True)
+        _PARSERS.parser = parser
+    return parser
+
+
 def find_headings(tree: etree._Element) -> List[etree._Element]:
     """
     Find all heading elements (h1-h6) in tree.
@@ -65,7 +116,7 @@ def find_headings(tree: etree._Element) -> List[etree._Element]:
     Returns:
         List of heading elements in document order
     """
-    return tree.xpath(".//h1 | .//h2 | .//h3 | .//h4 | .//h5 | .//h6")
+    return _XP_HEADINGS(tree)
 
 
 def find_paragraphs(tree: etree._Element) -> List[etree._Element]:
@@ -78,7 +129,7 @@ def find_paragraphs(tree: etree._Element) -> List[etree._Element]:
     Returns:
         List of paragraph elements in document order
     """
-    return tree.xpath(".//p")
+    return _XP_PARAGRAPHS(tree)
 
 
 def find_lists(tree: etree._Element) -> List[etree._Element]:
@@ -91,7 +142,7 @@ def find_lists(tree: etree._Element) -> List[etree._Element]:
     Returns:
         List of list elements in document order
     """
-    return tree.xpath(".//ul | .//ol")
+    return _XP_LISTS(tree)
 
 
 def serialize_xhtml(tree: etree._Element, pretty: bool = True) -> str:
@@ -110,15 +161,33 @@ def serialize_xhtml(tree: etree._Element, pretty: bool = True) -> str:
         - Preserves namespace declarations
         - Outputs well-formed XHTML
     """
+    return serialize_xhtml_bytes(tree, pretty).decode("utf-8")
+
+
+def serialize_xhtml_bytes(tree: etree._Element, pretty: bool = True) -> bytes:
+    """
+    Serialize Element tree to UTF-8 encoded XHTML.
+    
+    Same output as serialize_xhtml(), without the decode; rules write it
+    to disk as-is.
+    
+    Args:
+        tree: Root element
+        pretty: Whether to pretty-print (indent)
+    
+    Returns:
+        XHTML document as UTF-8 bytes
+    """
+    # indent() replaces existing whitespace-only text, which pretty_print
+    # alone leaves in place; after it pretty_print only adds the final
+    # newline, since libxml2 never indents inside elements that have text
     if pretty:
         etree.indent(tree, space="  ")
     
-    # Serialize to bytes first, then decode
-    xml_bytes = etree.tostring(
+    return etree.tostring(
         tree,
         encoding="utf-8",
         xml_declaration=True,
         method="xml",
         pretty_print=pretty
     )
-    return xml_bytes.decode("utf-8")
@@ -0,0 +1,91 @@
+"""Helpers for writing ZIP entries that were compressed ahead of time."""
+
+import os
+import zipfile
+import zlib
+from typing import Tuple
+
+# Deflate level used when repackaging (zlib default / zipfile default)
+DEFLATE_LEVEL = 6
+
+# Entries stored rather than deflated: formats that are already compressed,
+# and files too small for deflate to pay for itself
+_NON_COMPRESSIBLE_EXT = frozenset([
+    ".jpg", ".jpeg", ".png", ".gif", ".webp",
+    ".woff", ".woff2", ".mp3", ".mp4",
+])
+_STORE_BELOW = 512
+
+
+def compress_file(path: str, store_incompressible: bool = True) -> Tuple[bytes, int, int, int]:
+    """
+    Read a file and encode it as a ZIP entry payload.
+    
+    Args:
+        path: File to read
+        store_incompressible: Store already-compressed media and files under
+            512 bytes instead of deflating them
+    
+    Returns:
+        Tuple of (payload bytes, CRC-32, uncompressed size, compress type);
+        deflated payloads are raw deflate streams, as ZipFile.write() writes
+    """
+    with open(path, "rb") as fh:
+        data = fh.read()
+    crc = zlib.crc32(data)
+    if store_incompressible and (
+        len(data) < _STORE_BELOW or os.path.splitext(path)[1].lower() in _NON_COMPRESSIBLE_EXT
+    ):
+        return data, crc, len(data), zipfile.ZIP_STORED
+    compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15)
+    raw = compressor.compress(data) + compressor.flush()
+    return raw, crc, len(data), zipfile.ZIP_DEFLATED
+
+
+def write_raw_entry(zip_file: zipfile.ZipFile, zinfo: zipfile.ZipInfo, raw: bytes) -> None:
+    """
+    Append an entry whose payload is already compressed.
+    
+    zipfile has no public API for this, so this mirrors what
+    ZipFile.open(..., "w") does: write the local header (zinfo must already
+    carry CRC and sizes), then the payload, then register the entry.
+    
+    Args:
+        zip_file: Archive open for writing
+        zinfo: Entry metadata, including compress_type, CRC and sizes
+        raw: Payload, encoded as zinfo.compress_type says
+    """
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+    zip_file.fp.seek(zip_file.start_dir)
+    zinfo.header_offset = zip_file.fp.tell()
+    zip_file._writecheck(zinfo)
+    zip_file._didModify = True
+    zip_file.fp.write(zinfo.FileHeader(zip64))
+    zip_file.fp.write(raw)
+    zip_file.start_dir = zip_file.fp.tell()
+    zip_file.filelist.append(zinfo)
+    zip_file.NameToInfo[zinfo.filename] = zinfo
+
+
+def write_compressed_file(
+    zip_file: zipfile.ZipFile,
+    path: str,
+    arcname: str,
+    payload: Tuple[bytes, int, int, int]
+) -> None:
+    """
+    Append a file as an entry, given its compress_file() result.
+    
+    Args:
+        zip_file: Archive open for writing
+        path: File the payload was read from (for its timestamp and mode)
+        arcname: Name of the entry in the archive
+        payload: Return value of compress_file(path)
+    """
+    raw, crc, size, compress_type = payload
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    zinfo.compress_type = compress_type
+    zinfo.CRC = crc
+    zinfo.file_size = size
+    zinfo.compress_size = len(raw)
+    write_raw_entry(zip_file, zinfo, raw)
@@ -8,8 +8,8 @@ from pathlib import Path
 from .epub_io import copy_epub, extract_epub, repackage_epub, verify_epub_file
 from .reporting import Reporter
 from .upgrade import upgrade_to_epub3
-from .epub_io import get_opf_path
-from .versioning import detect_epub_version, load_opf
+from .epub_io import get_opf_path, read_version_from_zip
+from .versioning import read_epub_version
 
 
 def main() -> int:
@@ -27,6 +27,30 @@ def main() -> int:
         # Verify input file
         verify_epub_file(input_path)
         
+        if dry_run:
+            # Dry run: only detect and report; the OPF is read from the
+            # archive, so nothing is extracted
+            normalized_version, raw_version = read_version_from_zip(input_path)
+            
+            reporter = Reporter()
+            reporter.set_versions(normalized_version, raw_version)
+            
+            print(f"\nEPUB Version Detection (Dry Run)")
+            print("=" * 50)
+            print(f"Input file: {input_path}")
+            print(f"Detected version: {raw_version} ({normalized_version})")
+            
+            if normalized_version == "3":
+                print("Status: Already EPUB 3, no upgrade needed")
+            else:
+                print(f"Status: Would upgrade to EPUB {target_version}")
+            
+            if report_path:
+                reporter.write_json(report_path)
+                print(f"\nReport written to: {report_path}")
+            
+            return 0
+        
         # Extract to temporary directory
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
@@ -34,31 +58,12 @@ def main() -> int:
             
             # Load OPF and detect version
             opf_path = get_opf_path(temp_path)
-            opf_tree = load_opf(opf_path)
-            normalized_version, raw_version = detect_epub_version(opf_tree)
+            normalized_version, raw_version = read_epub_version(opf_path)
             
             # Initialize reporter
             reporter = Reporter()
             reporter.set_versions(normalized_version, raw_version)
             
-            if dry_run:
-                # Dry run: only detect and report
-                print(f"\nEPUB Version Detection (Dry Run)")
-                print("=" * 50)
-                print(f"Input file: {input_path}")
-                print(f"Detected version: {raw_version} ({normalized_version})")
-                
-                if normalized_version == "3":
-                    print("Status: Already EPUB 3, no upgrade needed")
-                else:
-                    print(f"Status: Would upgrade to EPUB {target_version}")
-                
-                if report_path:
-                    reporter.write_json(report_path)
-                    print(f"\nReport written to: {report_path}")
-                
-                return 0
-            
             # Determine if upgrade is needed
             needs_upgrade = normalized_version != "3" or force_rewrite
             
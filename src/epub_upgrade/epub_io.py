@@ -1,32 +1,47 @@
 """EPUB I/O utilities for extraction, inspection, and repackaging."""
 
+import os
 import tempfile
 import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Deque, Iterator, Optional, Tuple
 
-from .versioning import locate_opf_path, load_opf
+from epub_repair.zip_writer import compress_file, write_compressed_file
 
+from .versioning import locate_opf_path, load_opf, read_epub_version
 
-def verify_epub_file(epub_path: Path) -> None:
+
+def verify_epub_file(epub_path: Path, deep: bool = False) -> None:
     """
     Verify that the input file is a valid ZIP file (EPUB container).
     
+    By default only the central directory is read; extraction CRC-checks
+    every entry as it decompresses it, so reading them all here first would
+    only read the archive twice.
+    
     Args:
         epub_path: Path to EPUB file
+        deep: Also decompress and CRC-check every entry now
     
     Raises:
         FileNotFoundError: If file doesn't exist
-        zipfile.BadZipFile: If file is not a valid ZIP
+        zipfile.BadZipFile: If file is not a valid ZIP (or, with deep, has a
+            corrupt entry)
     """
     if not epub_path.exists():
         raise FileNotFoundError(f"EPUB file not found: {epub_path}")
     
     try:
         with zipfile.ZipFile(epub_path, "r") as zip_file:
-            # Try to read the ZIP file
-            zip_file.testzip()
-    except zipfile.BadZipFile as e:
+            if deep:
+                bad_entry = zip_file.testzip()
+                if bad_entry is not None:
+                    raise zipfile.BadZipFile(f"corrupt entry {bad_entry}")
+    except (zipfile.BadZipFile, zlib.error) as e:
         raise zipfile.BadZipFile(f"Not a valid EPUB (ZIP) file: {e}") from e
 
 
@@ -67,6 +82,44 @@ def get_opf_path(extracted_root: Path) -> Path:
     return extracted_root / opf_relative
 
 
+def read_version_from_zip(epub_path: Path) -> Tuple[str, str]:
+    """
+    Detect the EPUB version straight from the archive, without extracting it.
+    
+    Usually only the top of the OPF needs decompressing (see
+    read_epub_version()).
+    
+    Args:
+        epub_path: Path to EPUB file
+    
+    Returns:
+        Tuple of (normalized_version, raw_version)
+    
+    Raises:
+        ValueError: If container.xml or the OPF is missing or malformed
+    """
+    with _open_opf_in_zip(epub_path) as opf_file:
+        return read_epub_version(opf_file)
+
+
+@contextmanager
+def _open_opf_in_zip(epub_path: Path) -> Iterator[BinaryIO]:
+    """Open the OPF member of an EPUB archive, located via container.xml."""
+    with zipfile.ZipFile(epub_path, "r") as zip_file:
+        try:
+            with zip_file.open("META-INF/container.xml") as container_file:
+                opf_relative = locate_opf_path(container_file)
+        except KeyError:
+            raise ValueError("META-INF/container.xml not found") from None
+        
+        try:
+            opf_file = zip_file.open(opf_relative.as_posix())
+        except KeyError:
+            raise ValueError(f"OPF file not found in EPUB: {opf_relative}") from None
+        with opf_file:
+            yield opf_file
+
+
 def save_opf(opf_tree, opf_path: Path) -> None:
     """
     Save OPF tree back to file.
@@ -78,9 +131,10 @@ def save_opf(opf_tree, opf_path: Path) -> None:
     # Ensure parent directory exists
     opf_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # Write with XML declaration and proper formatting
+    # Write with XML declaration, as parsed (not re-indented: reading
+    # systems ignore whitespace, and it would only add bytes to deflate)
     opf_tree.write(
-        opf_path,
+        str(opf_path),
         encoding="utf-8",
         xml_declaration=True,
         method="xml"
@@ -99,20 +153,44 @@ def repackage_epub(extracted_root: Path, output_path: Path) -> None:
         - mimetype must be first entry (uncompressed)
         - Preserve directory structure
         - Use ZIP_DEFLATED compression (except mimetype)
+        - Entries are deflated in parallel (a bounded window at a time),
+          then written in order
     """
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
+    # Sorted so the archive is reproducible. os.walk gets file types from the
+    # directory entries, without a stat per file
+    root = str(extracted_root)
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            full_path = os.path.join(dirpath, name)
+            arcname = os.path.relpath(full_path, root)
+            if arcname != "mimetype":
+                entries.append((arcname, full_path))
+    
     with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
         # Add mimetype first, uncompressed (EPUB spec requirement)
         mimetype_path = extracted_root / "mimetype"
         if mimetype_path.exists():
             zip_file.write(mimetype_path, "mimetype", compress_type=zipfile.ZIP_STORED)
         
-        # Add all other files
-        for file_path in extracted_root.rglob("*"):
-            if file_path.is_file() and file_path.name != "mimetype":
-                arcname = file_path.relative_to(extracted_root)
-                zip_file.write(file_path, arcname, compress_type=zipfile.ZIP_DEFLATED)
+        # zlib releases the GIL while compressing, so threads scale across
+        # cores; at most 2 * max_workers entries are in flight, so only that
+        # many compressed payloads are ever held in memory
+        max_workers = min(8, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending: Deque[Tuple[str, str, Future]] = deque()
+            for arcname, path in entries:
+                future = executor.submit(compress_file, path, store_incompressible=False)
+                pending.append((arcname, path, future))
+                if len(pending) > 2 * max_workers:
+                    arcname, path, future = pending.popleft()
+                    write_compressed_file(zip_file, path, arcname, future.result())
+            
+            for arcname, path, future in pending:
+                write_compressed_file(zip_file, path, arcname, future.result())
 
 
 def copy_epub(input_path: Path, output_path: Path) -> None:
@@ -122,7 +200,41 @@ def copy_epub(input_path: Path, output_path: Path) -> None:
     Args:
         input_path: Source EPUB file
         output_path: Destination EPUB file
+    
+    Notes:
+        - On Linux the data is copied in the kernel with copy_file_range,
+          which can share blocks instead of copying on filesystems that
+          support it (btrfs, XFS); shutil.copy2 is the fallback
     """
     import shutil
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    same_file = output_path.exists() and output_path.samefile(input_path)
+    if hasattr(os, "copy_file_range") and not same_file:
+        try:
+            _copy_file_range(input_path, output_path)
+            shutil.copystat(input_path, output_path)
+            return
+        except OSError:
+            # Not supported for this pair of filesystems; the fallback
+            # rewrites the output from the start
+            pass
     shutil.copy2(input_path, output_path)
+
+
+def _copy_file_range(input_path: Path, output_path: Path) -> None:
+    """
+    Copy a whole file with os.copy_file_range.
+    
+    Raises:
+        OSError: If the copy fails or ends before the whole file is copied
+    """
+    with open(input_path, "rb") as src, open(output_path, "wb") as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+            if copied == 0:
+                # Source shrank, or the kernel gave up; copy_epub() falls
+                # back to shutil.copy2 rather than leave a truncated copy
+                raise OSError(f"copy_file_range stopped with {remaining} bytes left")
+            remaining -= copied
@@ -1,11 +1,29 @@
 """NCX to nav.xhtml conversion for EPUB 2 → EPUB 3 upgrade."""
 
+import os
 from pathlib import Path
 from typing import Optional
-from xml.etree import ElementTree as ET
 
+from lxml import etree
 
-def find_ncx_in_manifest(opf_tree: ET.ElementTree, extracted_root: Path, opf_path: Path) -> Optional[Path]:
+_TAG_MANIFEST = "{http://www.idpf.org/2007/opf}manifest"
+_TAG_ITEM = "{http://www.idpf.org/2007/opf}item"
+_NCX = "{http://www.daisy.org/z3986/2005/ncx/}"
+_TAG_NAV_MAP = _NCX + "navMap"
+_TAG_CONTENT = _NCX + "content"
+_XP_NAV_POINTS = etree.XPath("ncx:navPoint", namespaces={"ncx": _NCX[1:-1]})
+# Text of a navPoint's (first) label
+_XP_LABEL_TEXT = etree.XPath("ncx:navLabel[1]/ncx:text[1]", namespaces={"ncx": _NCX[1:-1]})
+
+_XHTML = "{http://www.w3.org/1999/xhtml}"
+_OPS_NS = "http://www.idpf.org/2007/ops"
+
+# NCX files come from the book: do not fetch or expand external entities,
+# but allow deeply nested tables of contents
+_NCX_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=True)
+
+
+def find_ncx_in_manifest(opf_tree: etree._ElementTree, extracted_root: Path, opf_path: Path) -> Optional[Path]:
     """
     Find NCX file in manifest and return its path.
     
@@ -18,28 +36,29 @@ def find_ncx_in_manifest(opf_tree: ET.ElementTree, extracted_root: Path, opf_pat
         Path to NCX file if found, None otherwise
     """
     root = opf_tree.getroot()
-    ns = {"opf": "http://www.idpf.org/2007/opf"}
     
-    manifest = root.find(".//opf:manifest", ns)
+    manifest = root.find(_TAG_MANIFEST)
     if manifest is None:
         return None
     
     opf_dir = opf_path.parent
     
-    for item in manifest.findall("opf:item", ns):
+    for item in manifest.findall(_TAG_ITEM):
         media_type = item.get("media-type", "")
         if media_type == "application/x-dtbncx+xml":
             href = item.get("href", "")
             if href:
-                # Resolve relative to OPF location
-                ncx_path = (opf_dir / href).resolve()
+                # Relative to OPF location, normalized but not resolved, so
+                # it stays under extracted_root even if that is reached
+                # through a symlink
+                ncx_path = Path(os.path.normpath(opf_dir / href))
                 if ncx_path.exists():
                     return ncx_path
     
     return None
 
 
-def parse_ncx(ncx_path: Path) -> ET.Element:
+def parse_ncx(ncx_path: Path) -> etree._Element:
     """
     Parse NCX file and extract navigation structure.
     
@@ -53,9 +72,9 @@ def parse_ncx(ncx_path: Path) -> ET.Element:
         ValueError: If NCX is malformed
     """
     try:
-        tree = ET.parse(ncx_path)
+        tree = etree.parse(str(ncx_path), _NCX_PARSER)
         return tree.getroot()
-    except ET.ParseError as e:
+    except etree.XMLSyntaxError as e:
         raise ValueError(f"Malformed NCX file: {e}") from e
 
 
@@ -73,41 +92,40 @@ def convert_ncx_to_nav_xhtml(ncx_path: Path, extracted_root: Path, opf_dir: Path
     """
     ncx_root = parse_ncx(ncx_path)
     
-    # NCX namespace
-    ncx_ns = {"ncx": "http://www.daisy.org/z3986/2005/ncx/"}
-    
     # Find navMap
-    nav_map = ncx_root.find(".//ncx:navMap", ncx_ns)
+    nav_map = ncx_root.find(_TAG_NAV_MAP)
     if nav_map is None:
         raise ValueError("No navMap found in NCX")
     
     # Create nav.xhtml
-    html = ET.Element("html", xmlns="http://www.w3.org/1999/xhtml", xmlns_epub="http://www.idpf.org/2007/ops")
-    head = ET.SubElement(html, "head")
-    title = ET.SubElement(head, "title")
+    html = etree.Element(_XHTML + "html", nsmap={None: _XHTML[1:-1], "epub": _OPS_NS})
+    head = etree.SubElement(html, _XHTML + "head")
+    title = etree.SubElement(head, _XHTML + "title")
     title.text = "Table of Contents"
     
-    body = ET.SubElement(html, "body")
-    nav = ET.SubElement(body, "nav", attrib={"epub:type": "toc"})
-    h1 = ET.SubElement(nav, "h1")
+    body = etree.SubElement(html, _XHTML + "body")
+    nav = etree.SubElement(body, _XHTML + "nav")
+    nav.set(f"{{{_OPS_NS}}}type", "toc")
+    h1 = etree.SubElement(nav, _XHTML + "h1")
     h1.text = "Table of Contents"
     
-    # Convert navPoints to nested list
-    ol = ET.SubElement(nav, "ol")
-    _convert_nav_points(nav_map.findall(".//ncx:navPoint", ncx_ns), ol, ncx_ns)
+    # Convert navPoints to nested list (top-level points here, nested ones
+    # under their parent's item)
+    ol = etree.SubElement(nav, _XHTML + "ol")
+    _convert_nav_points(_XP_NAV_POINTS(nav_map), ol)
     
     # Save nav.xhtml
     nav_path = opf_dir / "nav.xhtml"
     nav_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # Write with proper XML declaration
-    tree = ET.ElementTree(html)
-    tree.write(
-        nav_path,
+    # Write with proper XML declaration. Reading systems ignore the
+    # indentation, so the document is written compact
+    nav_path.write_bytes(etree.tostring(
+        html,
         encoding="utf-8",
         xml_declaration=True,
         method="xml"
-    )
+    ))
     
     # Return relative path from extracted_root
     try:
@@ -117,42 +135,43 @@ def convert_ncx_to_nav_xhtml(ncx_path: Path, extracted_root: Path, opf_dir: Path
         return nav_path
 
 
-def _convert_nav_points(nav_points: list, parent_ol: ET.Element, ncx_ns: dict):
+def _convert_nav_points(nav_points: list, parent_ol: etree._Element):
     """
-    Recursively convert NCX navPoints to HTML list items.
+    Convert NCX navPoints, and the navPoints nested in them, to HTML list items.
+    
+    Works through the levels with an explicit stack, so deep tables of
+    contents do not run into the recursion limit.
     
     Args:
         nav_points: List of navPoint elements
         parent_ol: Parent <ol> element to append to
-        ncx_ns: NCX namespace dictionary
     """
-    for nav_point in nav_points:
-        nav_label = nav_point.find("ncx:navLabel", ncx_ns)
-        content = nav_point.find("ncx:content", ncx_ns)
-        
-        if nav_label is None or content is None:
-            continue
-        
-        label_text = nav_label.find("ncx:text", ncx_ns)
-        if label_text is None:
-            continue
-        
-        text = label_text.text or ""
-        src = content.get("src", "")
-        
-        # Create list item
-        li = ET.SubElement(parent_ol, "li")
-        a = ET.SubElement(li, "a", href=src)
-        a.text = text
-        
-        # Handle nested navPoints
-        child_nav_points = nav_point.findall("ncx:navPoint", ncx_ns)
-        if child_nav_points:
-            child_ol = ET.SubElement(li, "ol")
-            _convert_nav_points(child_nav_points, child_ol, ncx_ns)
+    stack = [(nav_points, parent_ol)]
+    while stack:
+        nav_points, parent_ol = stack.pop()
+        for nav_point in nav_points:
+            label_texts = _XP_LABEL_TEXT(nav_point)
+            content = nav_point.find(_TAG_CONTENT)
+            
+            if not label_texts or content is None:
+                continue
+            
+            text = label_texts[0].text or ""
+            src = content.get("src", "")
+            
+            # Create list item
+            li = etree.SubElement(parent_ol, _XHTML + "li")
+            a = etree.SubElement(li, _XHTML + "a", href=src)
+            a.text = text
+            
+            # Nested navPoints go in a list of their own under this item
+            child_nav_points = _XP_NAV_POINTS(nav_point)
+            if child_nav_points:
+                child_ol = etree.SubElement(li, _XHTML + "ol")
+                stack.append((child_nav_points, child_ol))
 
 
-def add_nav_to_manifest(opf_tree: ET.ElementTree, nav_path: Path, opf_dir: Path) -> None:
+def add_nav_to_manifest(opf_tree: etree._ElementTree, nav_path: Path, opf_dir: Path) -> None:
     """
     Add nav.xhtml to OPF manifest with properties="nav".
     
@@ -162,9 +181,8 @@ def add_nav_to_manifest(opf_tree: ET.ElementTree, nav_path: Path, opf_dir: Path)
         opf_dir: Directory containing OPF
     """
     root = opf_tree.getroot()
-    ns = {"opf": "http://www.idpf.org/2007/opf"}
     
-    manifest = root.find(".//opf:manifest", ns)
+    manifest = root.find(_TAG_MANIFEST)
     if manifest is None:
         raise ValueError("No manifest found in OPF")
     
@@ -175,7 +193,7 @@ def add_nav_to_manifest(opf_tree: ET.ElementTree, nav_path: Path, opf_dir: Path)
         nav_relative = nav_path
     
     # Check if nav already exists
-    for item in manifest.findall("opf:item", ns):
+    for item in manifest.findall(_TAG_ITEM):
         if item.get("properties") == "nav":
             # Update existing nav item
             item.set("href", str(nav_relative))
@@ -183,7 +201,7 @@ def add_nav_to_manifest(opf_tree: ET.ElementTree, nav_path: Path, opf_dir: Path)
             return
     
     # Add new nav item
-    item = ET.SubElement(manifest, "item")
+    item = etree.SubElement(manifest, _TAG_ITEM)
     item.set("id", "nav")
     item.set("href", str(nav_relative))
     item.set("media-type", "application/xhtml+xml")
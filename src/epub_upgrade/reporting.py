@@ -76,8 +76,10 @@ class Reporter:
         Args:
             path: Output file path
         """
+        # Stream straight from self.data; json.dump only reads it, so the
+        # defensive copy to_json() makes is not needed here
         with open(path, "w", encoding="utf-8") as f:
-            json.dump(self.to_json(), f, indent=2, ensure_ascii=False)
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
     
     def print_summary(self) -> None:
         """Print a human-readable summary to stdout."""
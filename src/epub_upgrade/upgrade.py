@@ -1,19 +1,43 @@
 """High-level EPUB 2 → EPUB 3 upgrade orchestration."""
 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from xml.etree import ElementTree as ET
+from typing import Callable, Optional
+
+from lxml import etree
 
 from .epub_io import get_opf_path, load_opf, save_opf
 from .nav_conversion import add_nav_to_manifest, convert_ncx_to_nav_xhtml, find_ncx_in_manifest
 from .reporting import Reporter
 from .versioning import detect_epub_version
 
+_OPF = "{http://www.idpf.org/2007/opf}"
+_DC_NS = "http://purl.org/dc/elements/1.1/"
+_DC = "{" + _DC_NS + "}"
+_XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+_TAG_METADATA = _OPF + "metadata"
+_TAG_MANIFEST = _OPF + "manifest"
+_TAG_ITEM = _OPF + "item"
+_TAG_SPINE = _OPF + "spine"
+_TAG_ITEMREF = _OPF + "itemref"
+_TAG_DC_TITLE = _DC + "title"
+_TAG_DC_IDENTIFIER = _DC + "identifier"
+_TAG_DC_LANGUAGE = _DC + "language"
+
+# Content documents come from the book: do not fetch or expand external
+# entities. One parser per thread, since lxml lets only one parse at a time
+# use a parser
+_XHTML_PARSERS = threading.local()
+
 
 def upgrade_to_epub3(
     extracted_root: Path,
     target_version: str,
     reporter: Reporter,
-    force_rewrite: bool = False
+    force_rewrite: bool = False,
+    progress_cb: Optional[Callable[[float], None]] = None
 ) -> None:
     """
     Mutate the extracted EPUB directory in-place to become EPUB 3.
@@ -23,7 +47,11 @@ def upgrade_to_epub3(
         target_version: Target version (e.g., "3.0")
         reporter: Reporter instance for logging
         force_rewrite: If True, upgrade even if already EPUB 3
+        progress_cb: Optional callback receiving progress (0.0-1.0)
     """
+    if progress_cb is None:
+        progress_cb = _no_progress
+    
     # Load OPF and detect version
     opf_path = get_opf_path(extracted_root)
     opf_tree = load_opf(opf_path)
@@ -32,53 +60,55 @@ def upgrade_to_epub3(
     # If already EPUB 3 and not forcing rewrite, just return
     if normalized_version == "3" and not force_rewrite:
         reporter.note("Already EPUB 3, no upgrade needed")
+        progress_cb(1.0)
         return
     
     root = opf_tree.getroot()
-    ns = {"opf": "http://www.idpf.org/2007/opf", "dc": "http://purl.org/dc/elements/1.1/"}
     
     # 1. Update package version
     root.set("version", target_version)
     
+    # Metadata is a direct child of package; steps 2 and 3 share the lookup
+    metadata = root.find(_TAG_METADATA)
+    
     # 2. Ensure required attributes
-    if not root.get("xml:lang") and not root.get("lang"):
+    if not root.get(_XML_LANG) and not root.get("lang"):
         # Try to get language from metadata
-        metadata = root.find(".//opf:metadata", ns)
         if metadata is not None:
-            lang_elem = metadata.find("dc:language", ns)
+            lang_elem = metadata.find(_TAG_DC_LANGUAGE)
             if lang_elem is not None and lang_elem.text:
-                root.set("xml:lang", lang_elem.text.strip())
+                root.set(_XML_LANG, lang_elem.text.strip())
             else:
-                root.set("xml:lang", "en")
+                root.set(_XML_LANG, "en")
                 reporter.warn("No language found, defaulting to 'en'")
         else:
-            root.set("xml:lang", "en")
+            root.set(_XML_LANG, "en")
             reporter.warn("No metadata found, defaulting language to 'en'")
     
     # 3. Metadata sanity checks
-    metadata = root.find(".//opf:metadata", ns)
     if metadata is None:
         # Create metadata element if missing
-        metadata = ET.SubElement(root, "metadata", xmlns_dc="http://purl.org/dc/elements/1.1/")
+        metadata = etree.SubElement(root, _TAG_METADATA, nsmap={"dc": _DC_NS})
         reporter.warn("No metadata element found, created empty one")
     
-    # Check for required metadata fields
-    has_title = metadata.find("dc:title", ns) is not None
-    has_identifier = metadata.find("dc:identifier", ns) is not None
-    has_language = metadata.find("dc:language", ns) is not None
+    # Check for required metadata fields, in one pass over the children
+    present_tags = {child.tag for child in metadata}
+    has_title = _TAG_DC_TITLE in present_tags
+    has_identifier = _TAG_DC_IDENTIFIER in present_tags
+    has_language = _TAG_DC_LANGUAGE in present_tags
     
     if not has_title:
-        title = ET.SubElement(metadata, "dc:title")
+        title = etree.SubElement(metadata, _TAG_DC_TITLE)
         title.text = "Unknown Title"
         reporter.warn("Missing dc:title, added placeholder")
     
     if not has_identifier:
-        identifier = ET.SubElement(metadata, "dc:identifier", id="bookid")
+        identifier = etree.SubElement(metadata, _TAG_DC_IDENTIFIER, id="bookid")
         identifier.text = "unknown-id"
         reporter.warn("Missing dc:identifier, added placeholder")
     
     if not has_language:
-        language = ET.SubElement(metadata, "dc:language")
+        language = etree.SubElement(metadata, _TAG_DC_LANGUAGE)
         language.text = "en"
         reporter.warn("Missing dc:language, added placeholder 'en'")
     
@@ -100,30 +130,53 @@ def upgrade_to_epub3(
             reporter.note("nav.xhtml already exists, no conversion needed")
         else:
             reporter.warn("No NCX found and no nav.xhtml exists - EPUB 3 requires navigation")
+    progress_cb(0.3)
     
     # 5. Content document adjustments (minimal)
     # Ensure XHTML files have lang attribute
-    spine = root.find(".//opf:spine", ns)
+    spine = root.find(_TAG_SPINE)
     if spine is not None:
-        manifest = root.find(".//opf:manifest", ns)
+        manifest = root.find(_TAG_MANIFEST)
         if manifest is not None:
             # Get language from package or metadata
-            lang = root.get("xml:lang") or root.get("lang") or "en"
+            lang = root.get(_XML_LANG) or root.get("lang") or "en"
+            items_by_id = {item.get("id"): item for item in manifest.findall(_TAG_ITEM)}
             
-            for itemref in spine.findall("opf:itemref", ns):
-                idref = itemref.get("idref", "")
-                item = manifest.find(f".//opf:item[@id='{idref}']", ns)
+            # Each spine document once, in spine order
+            content_paths = {}
+            for itemref in spine.findall(_TAG_ITEMREF):
+                item = items_by_id.get(itemref.get("idref", ""))
                 if item is not None:
                     href = item.get("href", "")
                     media_type = item.get("media-type", "")
                     
                     if media_type == "application/xhtml+xml" and href:
-                        content_path = (opf_dir / href).resolve()
+                        # Normalized without resolve(), which would stat
+                        # every path component
+                        content_path = Path(os.path.normpath(opf_dir / href))
                         if content_path.exists():
-                            _ensure_xhtml_lang(content_path, lang)
+                            content_paths[content_path] = None
+            
+            # Files are independent and lxml releases the GIL while parsing
+            # and serializing, so they are patched in parallel
+            if content_paths:
+                max_workers = min(8, os.cpu_count() or 1)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [
+                        executor.submit(_ensure_xhtml_lang, content_path, lang)
+                        for content_path in content_paths
+                    ]
+                    for index, future in enumerate(futures):
+                        future.result()
+                        progress_cb(0.3 + 0.6 * (index + 1) / len(futures))
     
     # 6. Save updated OPF
     save_opf(opf_tree, opf_path)
+    progress_cb(1.0)
+
+
+def _no_progress(fraction: float) -> None:
+    """Default progress callback for upgrade_to_epub3 (ignores updates)."""
 
 
 def _ensure_xhtml_lang(xhtml_path: Path, lang: str) -> None:
@@ -135,18 +188,54 @@ def _ensure_xhtml_lang(xhtml_path: Path, lang: str) -> None:
         lang: Language code to use
     """
     try:
-        tree = ET.parse(xhtml_path)
+        # Most documents already have one: check the root's start tag before
+        # parsing the whole file
+        if _root_has_lang(xhtml_path):
+            return
+        
+        tree = etree.parse(str(xhtml_path), _xhtml_parser())
         root = tree.getroot()
         
         # Check if html element has lang or xml:lang
-        if not root.get("lang") and not root.get("{http://www.w3.org/XML/1998/namespace}lang"):
+        if not root.get("lang") and not root.get(_XML_LANG):
             root.set("lang", lang)
-            tree.write(
-                xhtml_path,
-                encoding="utf-8",
+            # Serialized from the tree, not the root, to keep the doctype
+            # ("UTF-8" is spelled as tree.write() declares it)
+            xhtml_path.write_bytes(etree.tostring(
+                tree,
+                encoding="UTF-8",
                 xml_declaration=True,
                 method="xml"
-            )
+            ))
     except Exception:
         # Silently fail - don't break upgrade for content issues
         pass
+
+
+def _xhtml_parser() -> etree.XMLParser:
+    """Get this thread's content document parser, creating it on first use."""
+    parser = getattr(_XHTML_PARSERS, "parser", None)
+    if parser is None:
+        parser = etree.XMLParser(resolve_entities=False, no_network=True)
+        _XHTML_PARSERS.parser = parser
+    return parser
+
+
+def _root_has_lang(xhtml_path: Path) -> bool:
+    """
+    Check whether a document's root element has lang or xml:lang.
+    
+    Only the XML up to the root start tag is parsed.
+    
+    Args:
+        xhtml_path: Path to XHTML file
+    
+    Returns:
+        True if the root element has a non-empty lang or xml:lang
+    """
+    events = etree.iterparse(
+        str(xhtml_path), events=("start",), resolve_entities=False, no_network=True
+    )
+    for _, root in events:
+        return bool(root.get("lang") or root.get(_XML_LANG))
+    return False
@@ -1,16 +1,40 @@
 """EPUB version detection and metadata helpers."""
 
+import io
+import os
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple
-from xml.etree import ElementTree as ET
+from typing import BinaryIO, Tuple, Union
 
+from lxml import etree
 
-def locate_opf_path(container_path: Path) -> Path:
+_OCF_ROOTFILE_PATH = (
+    "{urn:oasis:names:tc:opendocument:xmlns:container}rootfiles/"
+    "{urn:oasis:names:tc:opendocument:xmlns:container}rootfile"
+)
+
+# container.xml and the OPF come from the book: do not fetch or expand
+# external entities
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
+# The <package> start tag and its version attribute, looked for in the first
+# bytes of an OPF before falling back to a full parse
+_VERSION_SNIFF_BYTES = 4096
+_PACKAGE_VERSION_RE = re.compile(
+    rb"<(?:[\w.-]+:)?package\b[^>]*?\sversion\s*=\s*([\"'])([0-9A-Za-z.]+)\1"
+)
+
+
+def locate_opf_path(container_path: Union[Path, BinaryIO]) -> Path:
     """
     Locate the OPF path from container.xml.
     
+    The CLI and upgrade_to_epub3() each look the OPF up for the same book,
+    so results for files on disk are cached until the file changes.
+    
     Args:
-        container_path: Path to META-INF/container.xml
+        container_path: Path to META-INF/container.xml, or an open binary file
     
     Returns:
         Path to OPF file (relative to EPUB root)
@@ -18,18 +42,31 @@ def locate_opf_path(container_path: Path) -> Path:
     Raises:
         ValueError: If container.xml is malformed or OPF not found
     """
+    if isinstance(container_path, Path):
+        stat = container_path.stat()
+        return _locate_opf_path_cached(
+            os.path.abspath(container_path), stat.st_mtime_ns, stat.st_size
+        )
+    return _read_opf_path(container_path)
+
+
+@lru_cache(maxsize=32)
+def _locate_opf_path_cached(container_path: str, mtime_ns: int, size: int) -> Path:
+    """Cached locate_opf_path() for a file, keyed on its path and stat."""
+    return _read_opf_path(container_path)
+
+
+def _read_opf_path(container_path: Union[str, BinaryIO]) -> Path:
+    """Parse container.xml and return the OPF path it references."""
     try:
-        tree = ET.parse(container_path)
-    except ET.ParseError as e:
+        tree = _parse_xml(container_path)
+    except etree.XMLSyntaxError as e:
         raise ValueError(f"Malformed container.xml: {e}") from e
     
     root = tree.getroot()
     
-    # EPUB container namespace
-    ns = {"ocf": "urn:oasis:names:tc:opendocument:xmlns:container"}
-    
     # Find rootfile with media-type="application/oebps-package+xml" or "application/epub+zip"
-    rootfiles = root.findall(".//ocf:rootfile", ns)
+    rootfiles = root.findall(_OCF_ROOTFILE_PATH)
     for rootfile in rootfiles:
         media_type = rootfile.get("media-type", "")
         if media_type in ("application/oebps-package+xml", "application/epub+zip"):
@@ -40,7 +77,7 @@ def locate_opf_path(container_path: Path) -> Path:
     raise ValueError("OPF file reference not found in container.xml")
 
 
-def detect_epub_version(opf_tree: ET.ElementTree) -> Tuple[str, str]:
+def detect_epub_version(opf_tree: etree._ElementTree) -> Tuple[str, str]:
     """
     Detect EPUB version from OPF package element.
     
@@ -69,7 +106,45 @@ def detect_epub_version(opf_tree: ET.ElementTree) -> Tuple[str, str]:
     if not version:
         raise ValueError("No version attribute found in <package> element")
     
-    # Normalize version
+    return _normalize_version(version), version
+
+
+def read_epub_version(opf_path: Union[Path, BinaryIO]) -> Tuple[str, str]:
+    """
+    Detect EPUB version from an OPF file without parsing all of it.
+    
+    The version is read from the <package> start tag at the top of the
+    file; if it is not found there, the whole OPF is parsed as by
+    detect_epub_version().
+    
+    Args:
+        opf_path: Path to OPF file, or an open binary file
+    
+    Returns:
+        Tuple of (normalized_version, raw_version), as detect_epub_version()
+    
+    Raises:
+        ValueError: If OPF is malformed or has no version attribute
+    """
+    if isinstance(opf_path, Path):
+        with opf_path.open("rb") as opf_file:
+            return _read_epub_version(opf_file)
+    return _read_epub_version(opf_path)
+
+
+def _read_epub_version(opf_file: BinaryIO) -> Tuple[str, str]:
+    """read_epub_version() for an open binary file."""
+    head = opf_file.read(_VERSION_SNIFF_BYTES)
+    match = _PACKAGE_VERSION_RE.search(head)
+    # A comment before the match could be hiding it
+    if match and b"<!--" not in head[:match.start()]:
+        version = match.group(2).decode("ascii")
+        return _normalize_version(version), version
+    return detect_epub_version(load_opf(io.BytesIO(head + opf_file.read())))
+
+
+def _normalize_version(version: str) -> str:
+    """Reduce a raw version like "2.0.1" to its major version."""
     version_parts = version.split(".")
     major_version = version_parts[0]
     
@@ -81,15 +156,15 @@ def detect_epub_version(opf_tree: ET.ElementTree) -> Tuple[str, str]:
         # Unknown version, but return as-is
         normalized = major_version
     
-    return normalized, version
+    return normalized
 
 
-def load_opf(opf_path: Path) -> ET.ElementTree:
+def load_opf(opf_path: Union[Path, BinaryIO]) -> etree._ElementTree:
     """
     Load OPF file into XML tree.
     
     Args:
-        opf_path: Path to OPF file
+        opf_path: Path to OPF file, or an open binary file
     
     Returns:
         Parsed ElementTree
@@ -98,6 +173,13 @@ def load_opf(opf_path: Path) -> ET.ElementTree:
         ValueError: If OPF is malformed
     """
     try:
-        return ET.parse(opf_path)
-    except ET.ParseError as e:
+        return _parse_xml(opf_path)
+    except etree.XMLSyntaxError as e:
         raise ValueError(f"Malformed OPF file: {e}") from e
+
+
+def _parse_xml(source: Union[Path, BinaryIO]) -> etree._ElementTree:
+    """Parse an XML file from a path or an open binary file."""
+    if isinstance(source, Path):
+        source = str(source)
+    return etree.parse(source, _XML_PARSER)
@@ -8,28 +8,25 @@ import sys
 import os
 from pathlib import Path
 
+# Interpreter location inside a virtual environment
+if sys.platform == "win32":
+    VENV_PYTHON = Path("Scripts") / "python.exe"
+else:
+    VENV_PYTHON = Path("bin") / "python"
+
 def main():
     # Get the directory where this script is located
     script_dir = Path(__file__).parent.absolute()
     
-    # Try user's venv first
-    user_venv = Path.home() / "venv"
-    venv_path = None
-    
-    if user_venv.exists():
-        venv_path = user_venv
-    elif (script_dir / "venv").exists():
-        venv_path = script_dir / "venv"
-    
-    if venv_path:
-        if sys.platform == "win32":
-            python_exe = venv_path / "Scripts" / "python.exe"
-        else:
-            python_exe = venv_path / "bin" / "python"
-        
-        if python_exe.exists():
+    # Try user's venv first, then one next to this script. execv fails
+    # straight away if the interpreter is missing, so nothing is probed first
+    for venv_path in (Path.home() / "venv", script_dir / "venv"):
+        python_exe = str(venv_path / VENV_PYTHON)
+        try:
             # Use venv Python
-            os.execv(str(python_exe), [str(python_exe), "-m", "epub_repair.gui"] + sys.argv[1:])
+            os.execv(python_exe, [python_exe, "-m", "epub_repair.gui"] + sys.argv[1:])
+        except OSError:
+            continue
     
     # Fall back to system Python
     try:
@@ -6,27 +6,13 @@ from pathlib import Path
 def create_test_epub(output_path: Path):
     """Create a minimal EPUB with formatting issues for testing."""
     
-    # Create temporary directory structure
-    temp_dir = Path("/tmp/test_epub")
-    temp_dir.mkdir(exist_ok=True)
-    
-    # mimetype (must be first, uncompressed)
-    (temp_dir / "mimetype").write_text("application/epub+zip")
-    
     # META-INF/container.xml
-    meta_inf = temp_dir / "META-INF"
-    meta_inf.mkdir(exist_ok=True)
     container_xml = """<?xml version="1.0" encoding="UTF-8"?>
 <container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
   <rootfiles>
     <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
   </rootfiles>
 </container>"""
-    (meta_inf / "container.xml").write_text(container_xml)
-    
-    # OEBPS directory
-    oebps = temp_dir / "OEBPS"
-    oebps.mkdir(exist_ok=True)
     
     # content.opf
     opf_content = """<?xml version="1.0" encoding="UTF-8"?>
@@ -43,7 +29,6 @@ def create_test_epub(output_path: Path):
     <itemref idref="chapter1"/>
   </spine>
 </package>"""
-    (oebps / "content.opf").write_text(opf_content)
     
     # chapter1.xhtml with formatting issues
     chapter_xhtml = """<?xml version="1.0" encoding="UTF-8"?>
@@ -65,7 +50,6 @@ def create_test_epub(output_path: Path):
   <img src="test.jpg" />
 </body>
 </html>"""
-    (oebps / "chapter1.xhtml").write_text(chapter_xhtml)
     
     # style.css with aggressive CSS
     css_content = """body {
@@ -82,18 +66,22 @@ p.heading1 {
 div.body-text {
   text-indent: 20px;
 }"""
-    (oebps / "style.css").write_text(css_content)
     
-    # Create EPUB ZIP
-    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+    # Every file of the book, in archive order
+    files = [
+        ("META-INF/container.xml", container_xml),
+        ("OEBPS/content.opf", opf_content),
+        ("OEBPS/chapter1.xhtml", chapter_xhtml),
+        ("OEBPS/style.css", css_content),
+    ]
+    
+    # Create EPUB ZIP straight from the strings above; fixtures are small,
+    # so a fast compression level is enough
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
         # Add mimetype first, uncompressed
-        zip_file.write(temp_dir / "mimetype", "mimetype", compress_type=zipfile.ZIP_STORED)
-        
-        # Add all other files
-        for file_path in temp_dir.rglob("*"):
-            if file_path.is_file() and file_path.name != "mimetype":
-                arcname = file_path.relative_to(temp_dir)
-                zip_file.write(file_path, arcname)
+        zip_file.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        for arcname, data in files:
+            zip_file.writestr(arcname, data)
     
     print(f"Created test EPUB: {output_path}")
 
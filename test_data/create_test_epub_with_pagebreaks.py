@@ -6,26 +6,13 @@ from pathlib import Path
 def create_test_epub(output_path: Path):
     """Create a test EPUB with page breaks."""
     
-    temp_dir = Path("/tmp/test_epub_pb")
-    temp_dir.mkdir(exist_ok=True)
-    
-    # mimetype
-    (temp_dir / "mimetype").write_text("application/epub+zip")
-    
     # META-INF/container.xml
-    meta_inf = temp_dir / "META-INF"
-    meta_inf.mkdir(exist_ok=True)
     container_xml = """<?xml version="1.0" encoding="UTF-8"?>
 <container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
   <rootfiles>
     <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
   </rootfiles>
 </container>"""
-    (meta_inf / "container.xml").write_text(container_xml)
-    
-    # OEBPS directory
-    oebps = temp_dir / "OEBPS"
-    oebps.mkdir(exist_ok=True)
     
     # content.opf
     opf_content = """<?xml version="1.0" encoding="UTF-8"?>
@@ -43,7 +30,6 @@ def create_test_epub(output_path: Path):
     <itemref idref="chapter2"/>
   </spine>
 </package>"""
-    (oebps / "content.opf").write_text(opf_content)
     
     # chapter1.xhtml with unwanted page breaks
     chapter1_xhtml = """<?xml version="1.0" encoding="UTF-8"?>
@@ -64,7 +50,6 @@ def create_test_epub(output_path: Path):
   <p>End of chapter one content.</p>
 </body>
 </html>"""
-    (oebps / "chapter1.xhtml").write_text(chapter1_xhtml)
     
     # chapter2.xhtml - page break before chapter should be kept
     chapter2_xhtml = """<?xml version="1.0" encoding="UTF-8"?>
@@ -82,15 +67,22 @@ def create_test_epub(output_path: Path):
   <p>More content here.</p>
 </body>
 </html>"""
-    (oebps / "chapter2.xhtml").write_text(chapter2_xhtml)
     
-    # Create EPUB ZIP
-    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        zip_file.write(temp_dir / "mimetype", "mimetype", compress_type=zipfile.ZIP_STORED)
-        for file_path in temp_dir.rglob("*"):
-            if file_path.is_file() and file_path.name != "mimetype":
-                arcname = file_path.relative_to(temp_dir)
-                zip_file.write(file_path, arcname)
+    # Every file of the book, in archive order
+    files = [
+        ("META-INF/container.xml", container_xml),
+        ("OEBPS/content.opf", opf_content),
+        ("OEBPS/chapter1.xhtml", chapter1_xhtml),
+        ("OEBPS/chapter2.xhtml", chapter2_xhtml),
+    ]
+    
+    # Create EPUB ZIP straight from the strings above; fixtures are small,
+    # so a fast compression level is enough
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
+        # Add mimetype first, uncompressed
+        zip_file.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        for arcname, data in files:
+            zip_file.writestr(arcname, data)
     
     print(f"Created test EPUB with page breaks: {output_path}")
 
@@ -0,0 +1,13 @@
+"""Tests for CSS processing utilities."""
+
+from epub_repair.css_processor import build_selector_index, find_rules_by_selector, parse_css
+
+
+def test_find_rules_by_selector_with_index():
+    """Test indexed selector lookup matches the linear scan."""
+    rules = parse_css("body { margin: 0; }\np { margin: 0; }\nbody { padding: 0; }")
+    index = build_selector_index(rules)
+
+    assert find_rules_by_selector(rules, "body", index) == find_rules_by_selector(rules, "body")
+    assert len(find_rules_by_selector(rules, "body", index)) == 2
+    assert find_rules_by_selector(rules, "h1", index) == []
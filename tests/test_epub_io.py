@@ -0,0 +1,51 @@
+"""Tests for EPUB I/O utilities."""
+
+from pathlib import Path
+
+from epub_repair.epub_io import parse_container, parse_opf
+
+
+def test_parse_opf_resolves_hrefs_relative_to_root(tmp_path):
+    """Test parse_opf resolves manifest hrefs from the OPF directory to the EPUB root."""
+    opf_dir = tmp_path / "OEBPS"
+    opf_dir.mkdir()
+    opf_path = opf_dir / "content.opf"
+    opf_path.write_text(
+        '<package xmlns="http://www.idpf.org/2007/opf" version="3.0">'
+        "<manifest>"
+        '<item id="ch1" href="text/./ch1.xhtml" media-type="application/xhtml+xml"/>'
+        '<item id="css" href="../Styles/style.css" media-type="text/css"/>'
+        '<item id="out" href="../../outside.css" media-type="text/css"/>'
+        "</manifest>"
+        '<spine><itemref idref="ch1"/></spine>'
+        "</package>",
+        encoding="utf-8",
+    )
+
+    spine_items, manifest_items = parse_opf(opf_path, tmp_path)
+
+    assert manifest_items["ch1"].href == Path("OEBPS/text/ch1.xhtml")
+    assert manifest_items["css"].href == Path("Styles/style.css")
+    assert manifest_items["out"].href == Path("../../outside.css")
+    assert [item.href for item in spine_items] == [tmp_path / "OEBPS/text/ch1.xhtml"]
+
+
+def test_parse_container_fast_path_and_fallback(tmp_path):
+    """Test parse_container handles both regex-friendly and entity-encoded container.xml."""
+    container_path = tmp_path / "container.xml"
+    template = (
+        '<?xml version="1.0"?>'
+        '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+        "<rootfiles>{}</rootfiles></container>"
+    )
+
+    container_path.write_text(template.format(
+        "<rootfile full-path='OEBPS/content.opf' media-type='application/oebps-package+xml'/>"
+    ), encoding="utf-8")
+    assert parse_container(container_path) == Path("OEBPS/content.opf")
+
+    container_path.write_text(template.format(
+        '<!-- <rootfile full-path="old.opf" media-type="application/oebps-package+xml"/> -->'
+        '<rootfile full-path="A&amp;B/content.opf" media-type="application/oebps-package+xml"/>'
+    ), encoding="utf-8")
+    assert parse_container(container_path) == Path("A&B/content.opf")
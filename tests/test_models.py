@@ -1,5 +1,6 @@
 """Tests for data models."""
 
+import pickle
 from pathlib import Path
 
 import pytest
@@ -91,3 +92,34 @@ def test_epub_book_get_css_files():
     
     css_files = book.get_css_files()
     assert len(css_files) == 2
+
+
+def test_epub_book_get_manifest_item_by_href():
+    """Test EpubBook.get_manifest_item_by_href()."""
+    root = Path("/tmp/test")
+    style = ManifestItem(id="style", href=Path("OEBPS/style.css"), media_type="text/css")
+    
+    book = EpubBook(
+        root_path=root,
+        opf_path=root / "OEBPS" / "content.opf",
+        spine_items=[],
+        manifest_items={"style": style}
+    )
+    
+    assert book.get_manifest_item_by_href("OEBPS/style.css") is style
+    assert book.get_manifest_item_by_href("OEBPS/missing.css") is None
+
+
+def test_epub_book_get_xhtml_files_after_pickling():
+    """Test an unpickled book (as process-pool workers get it) still finds its XHTML files."""
+    root = Path("/tmp/test")
+    book = EpubBook(
+        root_path=root,
+        opf_path=root / "content.opf",
+        spine_items=[SpineItem(idref="ch1", href=root / "ch1.xhtml")],
+        manifest_items={
+            "ch1": ManifestItem(id="ch1", href=Path("ch1.xhtml"), media_type="application/xhtml+xml")
+        }
+    )
+    
+    assert pickle.loads(pickle.dumps(book)).get_xhtml_files() == [root / "ch1.xhtml"]
@@ -0,0 +1,28 @@
+"""Tests for NCX to nav.xhtml conversion."""
+
+from lxml import etree
+
+from epub_upgrade.nav_conversion import convert_ncx_to_nav_xhtml
+
+_NS = {"x": "http://www.w3.org/1999/xhtml", "epub": "http://www.idpf.org/2007/ops"}
+
+
+def test_convert_ncx_keeps_nesting(tmp_path):
+    """Test nested navPoints appear once, under their parent's list item."""
+    ncx_path = tmp_path / "toc.ncx"
+    ncx_path.write_text(
+        '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1"><navMap>'
+        '<navPoint id="a"><navLabel><text>One</text></navLabel><content src="c1.xhtml"/>'
+        '<navPoint id="a1"><navLabel><text>One.1</text></navLabel><content src="c1.xhtml#s1"/></navPoint>'
+        "</navPoint>"
+        '<navPoint id="b"><navLabel><text>Two</text></navLabel><content src="c2.xhtml"/></navPoint>'
+        "</navMap></ncx>",
+        encoding="utf-8",
+    )
+    
+    nav_relative = convert_ncx_to_nav_xhtml(ncx_path, tmp_path, tmp_path)
+    
+    nav = etree.parse(str(tmp_path / nav_relative)).find(".//x:nav", _NS)
+    assert nav.get("{http://www.idpf.org/2007/ops}type") == "toc"
+    assert [a.text for a in nav.xpath("x:ol/x:li/x:a", namespaces=_NS)] == ["One", "Two"]
+    assert [a.text for a in nav.xpath("x:ol/x:li/x:ol/x:li/x:a", namespaces=_NS)] == ["One.1"]
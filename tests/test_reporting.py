@@ -0,0 +1,30 @@
+"""Tests for the repair reporter."""
+
+from pathlib import Path
+
+import pytest
+
+from epub_repair.reporting import Reporter
+
+
+def test_changes_includes_changes_logged_after_a_read():
+    """Test reading changes midway does not hide later log_change() calls."""
+    reporter = Reporter()
+    reporter.log_change(Path("a.xhtml"), "first")
+    assert len(reporter.changes) == 1
+    
+    reporter.log_change(Path("b.xhtml"), "second", {"count": 2})
+    
+    assert list(reporter.changes) == [
+        {"file": "a.xhtml", "description": "first"},
+        {"file": "b.xhtml", "description": "second", "details": {"count": 2}},
+    ]
+    assert reporter.get_summary()["changes"] == list(reporter.changes)
+
+
+def test_changes_is_read_only():
+    """Test appending to changes fails instead of being silently lost."""
+    reporter = Reporter()
+    
+    with pytest.raises(AttributeError):
+        reporter.changes.append({"file": "a.xhtml", "description": "lost"})
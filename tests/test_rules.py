@@ -0,0 +1,82 @@
+"""Tests for formatting repair rules."""
+
+from pathlib import Path
+
+from epub_repair.models import EpubBook, ManifestItem, SpineItem
+from epub_repair.reporting import Reporter
+from epub_repair.rules import TREE_RULES, headings, images, lists
+from epub_repair.rules.pipeline import TreeRule, apply_tree_rules
+from epub_repair.xhtml_parser import parse_xhtml
+
+
+def _single_chapter_book(tmp_path, body):
+    """Create a book with one XHTML chapter holding body."""
+    chapter = tmp_path / "ch1.xhtml"
+    chapter.write_text(
+        '<html xmlns="http://www.w3.org/1999/xhtml"><head><title>t</title></head>'
+        f"<body>{body}</body></html>",
+        encoding="utf-8",
+    )
+    return EpubBook(
+        root_path=tmp_path,
+        opf_path=tmp_path / "content.opf",
+        spine_items=[SpineItem(idref="ch1", href=chapter)],
+        manifest_items={
+            "ch1": ManifestItem(id="ch1", href=Path("ch1.xhtml"), media_type="application/xhtml+xml")
+        },
+    ), chapter
+
+
+def test_apply_tree_rules_shares_one_parse(tmp_path):
+    """Test several rules change one tree and untouched files are not rewritten."""
+    book, chapter = _single_chapter_book(tmp_path, '<p class="heading1">Title</p><img src="a.png"/>')
+    reporter = Reporter()
+    
+    apply_tree_rules([headings.TREE_RULE, images.TREE_RULE], book, reporter)
+    
+    content = chapter.read_text(encoding="utf-8")
+    assert "<h1>Title</h1>" in content
+    assert 'alt=""' in content
+    assert reporter.counters == {
+        "headings.converted_fake_headings": 1,
+        "headings.fixed_nesting": 0,
+        "images.added_alt": 1,
+    }
+    
+    before = chapter.read_bytes()
+    apply_tree_rules(list(TREE_RULES.values()), book, Reporter())
+    assert chapter.read_bytes() == before
+
+
+def test_apply_tree_rules_discards_failed_rule_changes(tmp_path):
+    """Test a rule that raises part-way leaves no trace but its error."""
+    def apply_broken(tree, reporter, xhtml_path):
+        tree.find(".//body").clear()
+        raise RuntimeError("boom")
+    
+    broken = TreeRule(apply=apply_broken, may_apply=lambda raw: True, counters=())
+    book, chapter = _single_chapter_book(tmp_path, "<p>Keep</p><img src='a.png'/>")
+    reporter = Reporter()
+    
+    apply_tree_rules([broken, images.TREE_RULE], book, reporter)
+    
+    content = chapter.read_text(encoding="utf-8")
+    assert "<p>Keep</p>" in content
+    assert 'alt=""' in content
+    assert [change["description"] for change in reporter.changes] == [
+        "Error processing: boom",
+        "Added 1 alt attributes",
+    ]
+
+
+def test_normalize_lists_keeps_items_in_place(tmp_path):
+    """Test list-like paragraphs become a list where the first one was."""
+    book, chapter = _single_chapter_book(tmp_path, "<p>Intro</p><p>- one</p><p>- two</p><p>End</p>")
+    reporter = Reporter()
+    
+    lists.normalize_lists(book, reporter)
+    
+    body = parse_xhtml(chapter).find(".//body")
+    assert [child.tag for child in body] == ["p", "ul", "p"]
+    assert [li.text for li in body[1]] == ["one", "two"]
+    assert reporter.counters == {"lists.converted_paragraphs": 1}
@@ -0,0 +1,30 @@
+"""Tests for EPUB 2 to EPUB 3 upgrade orchestration."""
+
+from epub_upgrade.reporting import Reporter
+from epub_upgrade.upgrade import upgrade_to_epub3
+
+
+def test_upgrade_keeps_prefixes_and_existing_language(tmp_path):
+    """Test the rewritten OPF keeps its namespace prefixes and a single xml:lang."""
+    (tmp_path / "META-INF").mkdir()
+    (tmp_path / "META-INF" / "container.xml").write_text(
+        '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+        '<rootfiles><rootfile full-path="content.opf" media-type="application/oebps-package+xml"/>'
+        "</rootfiles></container>",
+        encoding="utf-8",
+    )
+    opf_path = tmp_path / "content.opf"
+    opf_path.write_text(
+        '<package xmlns="http://www.idpf.org/2007/opf" version="2.0" xml:lang="es">'
+        '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        "<dc:title>T</dc:title><dc:identifier>id</dc:identifier><dc:language>es</dc:language>"
+        "</metadata><manifest/><spine/></package>",
+        encoding="utf-8",
+    )
+
+    upgrade_to_epub3(tmp_path, "3.0", Reporter())
+
+    content = opf_path.read_text(encoding="utf-8")
+    assert '<package xmlns="http://www.idpf.org/2007/opf" version="3.0"' in content
+    assert content.count("xml:lang=") == 1
+    assert "<dc:title>T</dc:title>" in content
@@ -0,0 +1,16 @@
+"""Tests for XHTML parsing utilities."""
+
+from epub_repair.xhtml_parser import parse_xhtml_bytes
+
+
+def test_parse_xhtml_bytes_keeps_huge_and_deep_content():
+    """Test very large text nodes and deep nesting are parsed in full."""
+    text = "a" * (11 * 1024 * 1024)
+    tree = parse_xhtml_bytes(f"<html><body><p>{text}</p><img src='x.png'/></body></html>".encode("utf-8"))
+    assert tree.find(".//p").text == text
+    assert tree.find(".//img") is not None
+    
+    nested = "<div>" * 300 + "<img src='x.png'/>" + "</div>" * 300
+    tree = parse_xhtml_bytes(f"<html><body>{nested}</body></html>".encode("utf-8"))
+    assert len(tree.xpath("//div")) == 300
+    assert len(tree.xpath("//img")) == 1